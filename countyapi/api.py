@@ -1,21 +1,43 @@
 from copy import copy
 import csv
+from datetime import datetime, timedelta
+import hashlib
+import json
 import os
 
-from django.http import HttpResponse
+from django.core.servers.basehttp import FileWrapper
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
 from django.conf import settings
-from tastypie.exceptions import ApiFieldError, Unauthorized
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.encoding import force_bytes, force_text, iri_to_uri
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from tastypie.exceptions import ApiFieldError, BadRequest, ImmediateHttpResponse, Unauthorized
 from tastypie.bundle import Bundle
 from tastypie.fields import ToManyField, ToOneField
 from tastypie.resources import ModelResource, ALL, ALL_WITH_RELATIONS
 from tastypie.serializers import Serializer
 from tastypie.authorization import Authorization
-
+from tastypie.utils.mime import build_content_type
+from tastypie.utils import is_valid_jsonp_callback_value
+
+from countyapi.cache import data_generation
+from countyapi.compression import accepted_encoding, encode_response, encoding_suffix
+from countyapi.dataset import DATASET_CONTENT_TYPES, DATASET_DIR, dataset_files, dataset_format
+from countyapi.paginators import CURSOR, CursorPaginator, JailPaginator
+from countyapi.population import current_population
+from countyapi.stats import parse_dimensions, population_stats, stats_columns
+from countyapi.timeseries import SERIES, time_series
 from countyapi.models import CountyInmate, CourtLocation, CourtDate, HousingLocation, HousingHistory, \
-    DailyPopulationCounts, DailyBookingsCounts, ChargesHistory
+    DailyPopulationCounts, DailyBookingsCounts, ChargesHistory, DailyHousingOccupancy
 from utils import convert_to_int
 
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 
 COUNTY_API_INMATE_RESOURCE = 'countyapi.api.CountyInmateResource'
 
@@ -31,6 +53,16 @@ META = 'meta'
 
 TEXT_CSV = 'text/csv'
 
+TEXT_JAVASCRIPT = 'text/javascript'
+
+APPLICATION_NDJSON = 'application/x-ndjson'
+
+APPLICATION_MSGPACK = 'application/x-msgpack'
+
+APPLICATION_JSON = 'application/json'
+
+CALLBACK = 'callback'
+
 DELETE = 'delete'
 
 PUT = 'put'
@@ -53,18 +85,74 @@ HOUSING_LOCATION = 'housing_location'
 
 LOCATION = 'location'
 
+COURT_DATES_LOCATION = 'court_dates__location'
+
+HOUSING_HISTORY_LOCATION = 'housing_history__housing_location'
+
+# An inmate's histories and the lookups that prefetch them
+INMATE_HISTORIES = ((COURT_DATES, COURT_DATES_LOCATION), (HOUSING_HISTORY, HOUSING_HISTORY_LOCATION),
+                    (CHARGES_HISTORY, CHARGES_HISTORY))
+
 OBJECTS = 'objects'
 
 STD_HTTP_COMMANDS = [GET, POST, PUT, DELETE]
 
 RELATED = 'related'
 
+ORDER_BY = 'order_by'
+
+DIMENSIONS = 'dimensions'
+
+START_DATE = 'start_date'
+
+END_DATE = 'end_date'
+
+IDS = 'ids'
+
+JAIL_IDS = 'jail_ids'
+
+# Longest date ranges the population resource answers, with and without the inmates' jail ids
+MAX_POPULATION_DAYS = 10 * 366
+
+MAX_POPULATION_DAYS_WITH_IDS = 31
+
+SERIES_PARAM = 'series'
+
+FILE = 'file'
+
 INMATE = 'inmate'
 
 NEGATIVE_VALUES = {'0', 'false'}
 
 API_PATH_FORMAT = '/api/1.0/%s/'
 
+CSV_CONTENT_DISPOSITION = 'attachment; filename="cookcountyjail.csv"'
+
+STREAMED_FORMATS = {TEXT_CSV, APPLICATION_JSON, TEXT_JAVASCRIPT}
+
+# Formats whose lists are the objects one after another, with no meta section, which are always streamed
+OBJECT_STREAM_FORMATS = {APPLICATION_NDJSON, APPLICATION_MSGPACK}
+
+# Number of objects fetched at a time when streaming a list whose related objects are prefetched
+STREAMING_CHUNK_SIZE = 1000
+
+# Streamed output is sent in pieces of at least this many characters
+STREAMING_BUFFER_SIZE = 64 * 1024
+
+RESOURCE_URI = 'resource_uri'
+
+FIELDS = 'fields'
+
+# Stands in for the primary key when working out how a resource's detail URIs are built
+URI_PK_PLACEHOLDER = u'__pk__'
+
+# Field types whose dehydrate and to_simple come down to a plain conversion of the database value
+FLAT_VALUE_CONVERTERS = {
+    'string': lambda value: value if value is None else force_text(value),
+    'integer': lambda value: value if value is None else int(value),
+    'boolean': lambda value: value if value is None else bool(value),
+}
+
 
 def use_caching():
     """
@@ -81,7 +169,7 @@ def cache_ttl():
 
 
 if use_caching():
-    from tastypie.cache import SimpleCache
+    from countyapi.cache import JailCache
 
 
 DISCLAIMER = """
@@ -108,9 +196,29 @@ COUNTY_INMATE_URL = API_PATH_FORMAT % 'countyinmate'
 HOUSING_HISTORY_URL = API_PATH_FORMAT % 'housinghistory'
 HISTORY_LOCATION_URL = API_PATH_FORMAT % 'historylocation'
 CHARGES_HISTORY_URL = API_PATH_FORMAT % 'chargeshistory'
+STATS_URL = API_PATH_FORMAT % 'stats'
+POPULATION_URL = API_PATH_FORMAT % 'population'
+DAILY_HOUSING_OCCUPANCY_URL = API_PATH_FORMAT % 'dailyhousingoccupancy'
+TIME_SERIES_URL = API_PATH_FORMAT % 'timeseries'
+DATASET_URL = API_PATH_FORMAT % 'dataset'
+
 
+class JailRelatedField(object):
+    """
+    Mixin for the related fields, which dehydrate related objects with the related resource's nested instance
+    rather than with a new instance of it for each object, the way tastypie's get_related_resource does.
+    """
 
-class JailToOneField(ToOneField):
+    def get_related_resource(self, related_instance):
+        related_resource = self.to_class.nested()
+        if related_resource._meta.api_name is None and self._resource and \
+                self._resource._meta.api_name is not None:
+            related_resource._meta.api_name = self._resource._meta.api_name
+        related_resource.instance = related_instance
+        return related_resource
+
+
+class JailToOneField(JailRelatedField, ToOneField):
     def dehydrate(self, bundle, for_list=False):
         foreign_obj = None
 
@@ -142,8 +250,16 @@ class JailToOneField(ToOneField):
             return super(JailToOneField, self).dehydrate(bundle)
 
 
-class JailToManyField(ToManyField):
+class JailToManyField(JailRelatedField, ToManyField):
+    """
+    The related objects are dehydrated in full, once each, by the related resource's nested instance, when
+    shows_related says they are shown. Otherwise the field is None.
+    """
+
     def dehydrate(self, bundle, for_list=False):
+        if not self.shows_related(bundle):
+            return None
+
         if not bundle.obj or not bundle.obj.pk:
             if not self.null:
                 raise ApiFieldError(
@@ -180,51 +296,231 @@ class JailToManyField(ToManyField):
 
             return []
 
-        self.m2m_resources = []
+        resource = self.to_class.nested()
         m2m_dehydrated = []
+        for m2m in the_m2ms.all():
+            m2m_bundle = resource.build_bundle(obj=m2m, request=bundle.request)
+            m2m_dehydrated.append(resource.full_dehydrate(m2m_bundle, for_list=for_list).data)
+        return m2m_dehydrated
 
-        # TODO: Also model-specific and leaky. Relies on there being a
-        #       ``Manager`` there.
-        if has_related_request(bundle):
-            for m2m in the_m2ms.all():
-                m2m_resource = self.get_related_resource(m2m)
-                m2m_bundle = Bundle(obj=m2m, request=bundle.request)
-                self.m2m_resources.append(m2m_resource)
-                m2m_dehydrated.append(self.dehydrate_related(m2m_bundle, m2m_resource))
+    def shows_related(self, bundle):
+        """
+        The related objects are shown in the detail views of the resource the field is on and in its lists with
+        related=1, but not when its objects are nested in another resource's.
+        """
+        list_url = API_PATH_FORMAT % self._resource._meta.resource_name
+        return request_path_starts_with(bundle, list_url) and \
+            (bundle.request.path != list_url or has_related_request(bundle))
 
 
 class JailSerializer(Serializer):
     """
-    Serialize to json, jsonp, xml, and csv.
+    Serialize to json, jsonp, xml, csv and ndjson, and to msgpack when the msgpack module is installed.
     """
 
-    formats = ['json', 'jsonp', 'xml', 'csv']
+    formats = ['json', 'jsonp', 'xml', 'csv', 'ndjson'] + (['msgpack'] if msgpack is not None else [])
     content_types = {
-        'json': 'application/json',
-        'jsonp': 'text/javascript',
+        'json': APPLICATION_JSON,
+        'jsonp': TEXT_JAVASCRIPT,
         'xml': 'application/xml',
         'yaml': 'text/yaml',
         'html': 'text/html',
         'plist': 'application/x-plist',
         'csv': TEXT_CSV,
+        'ndjson': APPLICATION_NDJSON,
+        'msgpack': APPLICATION_MSGPACK,
     }
 
     def to_csv(self, data, options=None):
         """
-        Write to a simple CSV format.
+        Write to a simple CSV format. Data without a list of objects, such as a detail view or an error, is
+        written as one row. Lists are streamed by JailResource.get_csv_list rather than written here, so the CSV
+        is returned as a string, which tastypie puts in its response and the response cache can keep.
         """
         options = options or {}
         data = self.to_simple(data, options)
-        response = HttpResponse(mimetype=TEXT_CSV)
-        response['Content-Disposition'] = 'attachment; filename="cookcountyjail.csv"'
+        if OBJECTS not in data:
+            data = {OBJECTS: [data]}
+        return ''.join(self.iter_csv(data[OBJECTS], options))
 
-        writer = csv.writer(response)
-        writer.writerow(data[OBJECTS][0].keys())
+    def iter_csv(self, items, options=None, columns=None):
+        """
+        Generates the CSV one row at a time, the header row coming from the first item's keys unless the columns
+        are given. The items can be dehydrated bundles, so they are converted to simple data as they are written.
+        """
+        options = options or {}
+        writer = csv.writer(EchoBuffer())
+        header_written = False
+        for item in items:
+            item = self.to_simple(item, options)
+            if columns is not None:
+                if not header_written:
+                    yield writer.writerow(columns)
+                    header_written = True
+                yield writer.writerow([item.get(column) for column in columns])
+                continue
+            if not header_written:
+                yield writer.writerow(item.keys())
+                header_written = True
+            yield writer.writerow(item.values())
+
+    def to_ndjson(self, data, options=None):
+        """
+        Newline delimited JSON, a line for each object of a list, or a single line for data without a list of
+        objects. Like CSV it has no meta section.
+        """
+        options = options or {}
+        data = self.to_simple(data, options)
+        return u''.join(self.iter_ndjson(data[OBJECTS] if OBJECTS in data else [data], options))
 
-        for item in data[OBJECTS]:
-            writer.writerow(item.values())
+    def iter_ndjson(self, items, options=None):
+        options = options or {}
+        for item in items:
+            yield self.json_dumps(self.to_simple(item, options)) + u'\n'
 
-        return response
+    def to_msgpack(self, data, options=None):
+        """
+        MessagePack, the objects of a list packed one after another, or data without a list of objects packed on
+        its own, for reading with msgpack.Unpacker.
+        """
+        options = options or {}
+        data = self.to_simple(data, options)
+        return b''.join(self.iter_msgpack(data[OBJECTS] if OBJECTS in data else [data], options))
+
+    def iter_msgpack(self, items, options=None):
+        """
+        Packs the items one at a time. Values msgpack has no type for are packed the way they are written to JSON.
+        """
+        options = options or {}
+        packer = msgpack.Packer(default=DjangoJSONEncoder().default)
+        for item in items:
+            yield packer.pack(self.to_simple(item, options))
+
+    def iter_json(self, data, options=None):
+        """
+        Generates the same JSON as to_json a piece at a time, the objects of a list are converted and encoded
+        one by one as they are produced.
+        """
+        options = options or {}
+        separator = u''
+        yield u'{'
+        for key in sorted(data.keys()):
+            yield u'%s%s: ' % (separator, self.json_dumps(key))
+            if key == OBJECTS:
+                yield u'['
+                item_separator = u''
+                for item in data[key]:
+                    yield item_separator + self.json_dumps(self.to_simple(item, options))
+                    item_separator = u', '
+                yield u']'
+            else:
+                yield self.json_dumps(self.to_simple(data[key], options))
+            separator = u', '
+        yield u'}'
+
+    def iter_jsonp(self, data, options):
+        """
+        Generates the same JSONP as to_jsonp a piece at a time.
+        """
+        yield u'%s(' % options[CALLBACK]
+        for chunk in self.iter_json(data, options):
+            yield self.jsonp_escape(chunk)
+        yield u')'
+
+    @staticmethod
+    def jsonp_escape(text):
+        """
+        Escapes the line and paragraph separators that JSON allows in strings but JavaScript does not.
+        """
+        return text.replace(u'\u2028', u'\\u2028').replace(u'\u2029', u'\\u2029')
+
+    @staticmethod
+    def json_dumps(data):
+        return json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, ensure_ascii=False)
+
+    def to_simple(self, data, options):
+        """
+        Flat rows are made of simple values already, so they are passed through as they are.
+        """
+        if isinstance(data, FlatRow):
+            return data
+        return super(JailSerializer, self).to_simple(data, options)
+
+
+class EchoBuffer(object):
+    """
+    File like object whose write returns what is written, so csv.writer rows can be yielded.
+    """
+
+    def write(self, value):
+        return value
+
+
+class FlatRow(dict):
+    """
+    A list object built by FlatRowTemplate, its values are already in their serialized form.
+    """
+
+
+class FlatRowTemplate(object):
+    """
+    Precompiled layout of the objects in a resource's flat list, i.e. one without related=1: the columns to read
+    with values_list and how each value is converted, so the rows come straight from the database tuples with
+    the same keys and values full_dehydrate and the serializer give, without building model instances or bundles.
+    Given the fields of a fields parameter, only those keys are built and only their columns read.
+    """
+
+    def __init__(self, resource, fields=None):
+        serializer = resource._meta.serializer
+        self._to_simple = lambda value: serializer.to_simple(value, {})
+        self.columns = []
+        converters = {}
+        for field_name, field in resource.fields.items():
+            if getattr(field, 'use_in', 'all') not in ('all', 'list'):
+                continue
+            if fields is not None and field_name not in fields:
+                continue
+            if field_name == RESOURCE_URI:
+                converters[field_name] = self._column('pk'), uri_converter(resource)
+            elif getattr(field, 'is_m2m', False):
+                # JailToManyField does not show the related objects in lists without related=1
+                converters[field_name] = self._column('pk'), lambda _: None
+            elif getattr(field, 'is_related', False):
+                related_resource = field.get_related_resource(None)
+                converters[field_name] = self._column(field.attribute), uri_converter(related_resource)
+            else:
+                converters[field_name] = self._column(field.attribute), self._value_converter(field, serializer)
+        for key, column in resource.flat_list_extras:
+            if fields is None or key in fields:
+                converters[key] = self._column(column), self._to_simple
+        # converters is filled in the same order as full_dehydrate fills bundle.data, so rows built from its keys
+        # list their keys in the same order as the serialized bundles, which is the CSV column order
+        self.keys = converters.keys()
+        self._getters = [converters[key] for key in self.keys]
+
+    def _column(self, column):
+        if column not in self.columns:
+            self.columns.append(column)
+        return self.columns.index(column)
+
+    def _value_converter(self, field, serializer):
+        """
+        Converts a column value the way the field's dehydrate and then the serializer's to_simple would.
+        """
+        convert = FLAT_VALUE_CONVERTERS.get(field.dehydrated_type,
+                                            lambda value: serializer.to_simple(field.convert(value), {}))
+        if not field.has_default():
+            return convert
+        return lambda value: convert(field.default if value is None else value)
+
+    def rows(self, objects):
+        """
+        Generates the flat rows of the objects, reading one database tuple at a time.
+        """
+        keys = self.keys
+        getters = self._getters
+        for values in objects.values_list(*self.columns).iterator():
+            yield FlatRow(zip(keys, [convert(values[index]) for index, convert in getters]))
 
 
 class JailAuthorization(Authorization):
@@ -270,6 +566,24 @@ class JailResource(ModelResource):
     """
     ModelResource overrides for our project. Add caching and disclaimer.
     """
+    # (key, values_list column) pairs that dehydrate adds to the objects of a flat list with add_flat_list_extras,
+    # in the order it adds them. Resources that set it have their flat CSV, JSON and JSONP lists built by
+    # FlatRowTemplate, which reads the same columns.
+    flat_list_extras = None
+
+    _flat_row_template = None
+
+    # (api_name, uri_converter) of the resource's detail URIs
+    _detail_uri_converter = None
+
+    # Field, with a leading - for descending, that cursor pagination orders by, it must be unique and not null.
+    # Resources that leave it unset do not do cursor pagination.
+    cursor_ordering = None
+
+    # Query parameters of the full lists the write_exports command writes out, keyed by format. Requests for the
+    # list with exactly these parameters are answered with the export file.
+    list_exports = {}
+
     def __init__(self, api_name=None):
         """
         Patched init that doesn't use deepcopy,
@@ -280,6 +594,357 @@ class JailResource(ModelResource):
         if api_name:
             self._meta.api_name = api_name
 
+    @classmethod
+    def nested(cls):
+        """
+        The instance of the resource that dehydrates its objects when they are nested in another resource's
+        objects. It is made once per process and reused, the way tastypie makes one instance of each resource it
+        registers, rather than once per nested object.
+        """
+        if '_nested_resource' not in cls.__dict__:
+            cls._nested_resource = cls()
+        return cls._nested_resource
+
+    def get_resource_uri(self, bundle_or_obj=None, url_name='api_dispatch_list'):
+        """
+        Detail URIs are made by putting the primary key in a URI reversed once, see uri_converter, rather than by
+        reversing one for every object, which was most of the work of dehydrating nested objects.
+        """
+        if bundle_or_obj is None or url_name != 'api_dispatch_list' or self._meta.detail_uri_name != 'pk':
+            return super(JailResource, self).get_resource_uri(bundle_or_obj, url_name)
+        if self._detail_uri_converter is None or self._detail_uri_converter[0] != self._meta.api_name:
+            self._detail_uri_converter = self._meta.api_name, uri_converter(self)
+        obj = bundle_or_obj.obj if isinstance(bundle_or_obj, Bundle) else bundle_or_obj
+        return self._detail_uri_converter[1](obj.pk)
+
+    def dispatch(self, request_type, request, **kwargs):
+        """
+        GET responses carry an ETag and Last-Modified worked out from the data generation, and a request whose
+        If-None-Match or If-Modified-Since still holds is answered with a 304 before any queries are made.
+        GET responses are kept in the cache until the data changes. Streamed responses are raised rather than
+        returned, so they are never cached. Successful responses are compressed in the encoding negotiated from
+        Accept-Encoding before they are cached, so the cache keeps them compressed.
+        """
+        if request.method != 'GET':
+            return super(JailResource, self).dispatch(request_type, request, **kwargs)
+        generation = data_generation()
+        encoding = accepted_encoding(request)
+        cache_key = self.response_cache_key(request, encoding)
+        etag = hashlib.md5(force_bytes('%d:%s' % (generation, cache_key))).hexdigest()
+        last_modified = generation // 1000
+        if not_modified(request, etag, last_modified):
+            response = HttpResponseNotModified()
+            if self._meta.cache.cache_control():
+                patch_cache_control(response, **self._meta.cache.cache_control())
+        else:
+            try:
+                response = self._meta.cache.get(cache_key)
+                if response is None:
+                    response = encode_response(super(JailResource, self).dispatch(request_type, request, **kwargs),
+                                               encoding)
+                    if self._meta.cache.cacheable(request, response):
+                        self._meta.cache.set(cache_key, response)
+            except ImmediateHttpResponse as e:
+                encode_response(e.response, encoding)
+                add_validators(e.response, etag, last_modified)
+                raise
+        add_validators(response, etag, last_modified)
+        return response
+
+    def response_cache_key(self, request, encoding=None):
+        """
+        The format can come from the Accept header, so it is part of the key along with the path, query string and
+        the response's encoding.
+        """
+        return self.generate_cache_key('response', path=request.get_full_path(),
+                                       accept=request.META.get('HTTP_ACCEPT', ''), encoding=encoding or '')
+
+    def get_list(self, request, **kwargs):
+        """
+        CSV, NDJSON and MessagePack lists, and JSON and JSONP lists without a limit, are streamed, everything else
+        is paged the way tastypie does it. Lists that have been exported are sent from the export file.
+        """
+        export_format = self.list_export_format(request)
+        if export_format:
+            return self.export_response(request, export_format)
+        desired_format = self.determine_format(request)
+        paginator = self.list_paginator(request, **kwargs)
+        if desired_format == TEXT_CSV:
+            return self.get_csv_list(request, paginator)
+        if desired_format in OBJECT_STREAM_FORMATS:
+            return self.get_object_stream_list(request, paginator, desired_format)
+        if desired_format in STREAMED_FORMATS and paginator.get_limit() == 0:
+            return self.get_json_list(request, paginator, desired_format)
+        return self.get_page_list(request, paginator)
+
+    def list_paginator(self, request, **kwargs):
+        """
+        Sets up the paginator over the filtered and sorted objects the same way tastypie's get_list does.
+        A cursor parameter asks for the resource's cursor pagination instead, see CursorPaginator.
+        """
+        base_bundle = self.build_bundle(request=request)
+        objects = self.obj_get_list(bundle=base_bundle, **self.remove_api_resource_names(kwargs))
+        fields = self.requested_fields(request)
+        if fields is not None:
+            objects = objects.only(*self.field_columns(fields, objects))
+        paginator_kwargs = {
+            'cache': self._meta.cache,
+            'resource_uri': self.get_resource_uri(),
+            'limit': self._meta.limit,
+            'max_limit': self._meta.max_limit,
+            'collection_name': self._meta.collection_name,
+        }
+        if CURSOR in request.GET:
+            if not self.cursor_ordering:
+                raise BadRequest('Cursor pagination is not available for this resource.')
+            if ORDER_BY in request.GET:
+                raise BadRequest('Cursor pagination can not be combined with order_by.')
+            return CursorPaginator(request.GET, objects, self.cursor_ordering, **paginator_kwargs)
+        sorted_objects = self.apply_sorting(objects, options=request.GET)
+        return self._meta.paginator_class(request.GET, sorted_objects, **paginator_kwargs)
+
+    def get_page_list(self, request, paginator):
+        """
+        Dehydrates and serializes a page of objects the same way tastypie's get_list does.
+        """
+        to_be_serialized = paginator.page()
+        collection_name = self._meta.collection_name
+        to_be_serialized[collection_name] = [self.full_dehydrate(self.build_bundle(obj=obj, request=request),
+                                                                 for_list=True)
+                                             for obj in to_be_serialized[collection_name]]
+        to_be_serialized = self.alter_list_data_to_serialize(request, to_be_serialized)
+        return self.create_response(request, to_be_serialized)
+
+    def requested_fields(self, request):
+        """
+        The fields the request's fields parameter asks for, in the order given, or None when there is none.
+        Only the objects of the resource the request is for are restricted, not the ones nested in them.
+        The parameter is parsed once per request and resource, the result is kept on the request.
+        """
+        parsed_fields = getattr(request, '_requested_fields', None)
+        if parsed_fields is None:
+            parsed_fields = request._requested_fields = {}
+        resource_name = self._meta.resource_name
+        if resource_name not in parsed_fields:
+            parsed_fields[resource_name] = self.parse_requested_fields(request)
+        return parsed_fields[resource_name]
+
+    def parse_requested_fields(self, request):
+        fields_param = request.GET.get(FIELDS)
+        if not fields_param or not request.path.startswith(API_PATH_FORMAT % self._meta.resource_name):
+            return None
+        known_fields = set(self.fields)
+        known_fields.update(key for key, _ in self.flat_list_extras or ())
+        fields = []
+        for field_name in fields_param.split(','):
+            field_name = field_name.strip()
+            if field_name and field_name not in fields:
+                if field_name not in known_fields:
+                    raise BadRequest("Invalid field '%s' provided. Please provide fields from: %s." %
+                                     (field_name, ', '.join(sorted(known_fields))))
+                fields.append(field_name)
+        return fields or None
+
+    def shows_field(self, request, field_name):
+        fields = self.requested_fields(request)
+        return fields is None or field_name in fields
+
+    def field_columns(self, fields, objects):
+        """
+        The model fields to read for the requested fields, which include the relations the objects select.
+        """
+        columns = [field.attribute.split('__')[0] for field_name, field in self.fields.items()
+                   if field_name in fields and isinstance(field.attribute, basestring) and
+                   not getattr(field, 'is_m2m', False)]
+        columns.extend(column.split('__')[0] for key, column in self.flat_list_extras or () if key in fields)
+        if isinstance(objects.query.select_related, dict):
+            columns.extend(objects.query.select_related)
+        return set(columns)
+
+    def full_dehydrate(self, bundle, for_list=False):
+        """
+        With a fields parameter only the requested fields are dehydrated, the way tastypie's full_dehydrate
+        dehydrates all of them. The resources' dehydrate methods check shows_field before adding anything,
+        and only the requested fields are kept from what they add.
+        """
+        fields = self.requested_fields(bundle.request)
+        if fields is None:
+            return super(JailResource, self).full_dehydrate(bundle, for_list=for_list)
+        use_in = ['all', 'list' if for_list else 'detail']
+        for field_name in fields:
+            field = self.fields.get(field_name)
+            if field is None or getattr(field, 'use_in', 'all') not in use_in:
+                continue
+            if getattr(field, 'dehydrated_type', None) == 'related':
+                field.api_name = self._meta.api_name
+                field.resource_name = self._meta.resource_name
+            bundle.data[field_name] = field.dehydrate(bundle, for_list=for_list)
+            method = getattr(self, 'dehydrate_%s' % field_name, None)
+            if method:
+                bundle.data[field_name] = method(bundle)
+        bundle = self.dehydrate(bundle)
+        for key in bundle.data.keys():
+            if key not in fields:
+                del bundle.data[key]
+        return bundle
+
+    def add_flat_list_extras(self, bundle):
+        """
+        Adds the flat_list_extras to the bundle, each one the value its column has in the database, so the objects
+        of flat lists are the same whether they are dehydrated or built by FlatRowTemplate. With a fields
+        parameter only the requested ones are added.
+        """
+        fields = self.requested_fields(bundle.request)
+        for key, column in self.flat_list_extras:
+            if fields is not None and key not in fields:
+                continue
+            obj = bundle.obj
+            attributes = column.split('__')
+            for attribute in attributes[:-1]:
+                obj = getattr(obj, attribute)
+            bundle.data[key] = getattr(obj, obj._meta.get_field(attributes[-1]).attname)
+
+    def dehydrated_bundles(self, request, objects):
+        """
+        Generates the dehydrated bundles of the objects one at a time.
+        """
+        for obj in iterate_objects(objects):
+            yield self.full_dehydrate(self.build_bundle(obj=obj, request=request), for_list=True)
+
+    def list_objects(self, request, objects):
+        """
+        Generates the objects of a streamed list, flat lists of resources with flat_list_extras are read straight
+        from the database, everything else is dehydrated.
+        """
+        if self.flat_list_extras is None or request.REQUEST.get(RELATED) == '1':
+            return self.dehydrated_bundles(request, objects)
+        return self.flat_row_template(self.requested_fields(request)).rows(objects)
+
+    def flat_row_template(self, fields=None):
+        if fields is not None:
+            return FlatRowTemplate(self, fields)
+        if self._flat_row_template is None:
+            self._flat_row_template = FlatRowTemplate(self)
+        return self._flat_row_template
+
+    def get_csv_list(self, request, paginator):
+        """
+        Streams a CSV list, each object being read, dehydrated and written out in turn, so memory use does not
+        depend on how many objects there are. The CSV has no meta section, so the total count is not queried.
+        With a fields parameter the columns are the requested fields in the order given.
+        """
+        page_objects = paginator.get_slice(paginator.get_limit(), paginator.get_offset())
+        rows = self._meta.serializer.iter_csv(self.list_objects(request, page_objects),
+                                              columns=self.requested_fields(request))
+        response = StreamingHttpResponse(buffered(rows), content_type=build_content_type(TEXT_CSV))
+        response['Content-Disposition'] = CSV_CONTENT_DISPOSITION
+        return self.streaming_response(request, response)
+
+    def get_object_stream_list(self, request, paginator, desired_format):
+        """
+        Streams an NDJSON or MessagePack list, each object being read, dehydrated and written out in turn, so a
+        client can read the objects as they arrive. Like CSV there is no meta section and no total count query.
+        """
+        page_objects = paginator.get_slice(paginator.get_limit(), paginator.get_offset())
+        objects = self.list_objects(request, page_objects)
+        if desired_format == APPLICATION_MSGPACK:
+            chunks = self._meta.serializer.iter_msgpack(objects)
+        else:
+            chunks = self._meta.serializer.iter_ndjson(objects)
+        response = StreamingHttpResponse(buffered(chunks), content_type=format_content_type(desired_format))
+        return self.streaming_response(request, response)
+
+    def get_json_list(self, request, paginator, desired_format):
+        """
+        Streams a JSON or JSONP list, the meta section is written first and then each object as it is dehydrated.
+        The output is the same as tastypie's.
+        """
+        options = {}
+        if desired_format == TEXT_JAVASCRIPT:
+            options[CALLBACK] = request.GET.get(CALLBACK, CALLBACK)
+            if not is_valid_jsonp_callback_value(options[CALLBACK]):
+                raise BadRequest('JSONP callback name is invalid.')
+        page = self.list_page(request, paginator)
+        if desired_format == TEXT_JAVASCRIPT:
+            chunks = self._meta.serializer.iter_jsonp(page, options)
+        else:
+            chunks = self._meta.serializer.iter_json(page, options)
+        response = StreamingHttpResponse(buffered(chunks), content_type=build_content_type(desired_format))
+        return self.streaming_response(request, response)
+
+    def list_page(self, request, paginator):
+        """
+        The data of a streamed JSON or JSONP list, its objects are generated as they are serialized.
+        """
+        page = paginator.page()
+        collection_name = self._meta.collection_name
+        page[collection_name] = self.list_objects(request, page[collection_name])
+        return self.alter_list_data_to_serialize(request, page)
+
+    def list_export_format(self, request):
+        """
+        The format of the export written for the request's query string, None if it has not been exported.
+        """
+        query = request.GET.dict()
+        for export_format, params in self.list_exports.items():
+            if query == params and os.path.exists(self.export_path(export_format)):
+                return export_format
+        return None
+
+    def export_path(self, export_format, exports_dir=None):
+        return os.path.join(exports_dir or settings.EXPORTS_DIR, '%s.%s' % (self._meta.resource_name, export_format))
+
+    def export_response(self, request, export_format):
+        """
+        Sends an export file.
+        """
+        content_type = build_content_type(self._meta.serializer.content_types[export_format])
+        response = self.file_response(request, self.export_path(export_format), content_type)
+        if content_type.startswith(TEXT_CSV):
+            response['Content-Disposition'] = CSV_CONTENT_DISPOSITION
+        return self.streaming_response(request, response)
+
+    def file_response(self, request, path, content_type):
+        """
+        The response sending a file from EXPORTS_DIR. When EXPORTS_URL is set the web server sends it, otherwise
+        it is streamed from here, as its precompressed copy when the client accepts that copy's encoding.
+        """
+        if settings.EXPORTS_URL:
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = settings.EXPORTS_URL + os.path.relpath(path, settings.EXPORTS_DIR)
+        else:
+            encoding = accepted_encoding(request)
+            if encoding is not None and os.path.exists(path + encoding_suffix(encoding)):
+                path += encoding_suffix(encoding)
+            else:
+                encoding = None
+            response = StreamingHttpResponse(FileWrapper(open(path, 'rb')), content_type=content_type)
+            response['Content-Length'] = os.path.getsize(path)
+            if encoding is not None:
+                response['Content-Encoding'] = encoding
+        return response
+
+    def create_response(self, request, data, response_class=HttpResponse, **response_kwargs):
+        """
+        tastypie's create_response, with the content type from format_content_type.
+        """
+        desired_format = self.determine_format(request)
+        serialized = self.serialize(request, data, desired_format)
+        return response_class(content=serialized, content_type=format_content_type(desired_format), **response_kwargs)
+
+    def streaming_response(self, request, response):
+        """
+        tastypie's dispatch replaces anything that is not an HttpResponse with a 204, and StreamingHttpResponse
+        is not one, so the response is raised as an ImmediateHttpResponse instead. That skips the Vary and
+        Cache-Control headers wrap_view adds, so they are added here.
+        """
+        varies = getattr(self._meta.cache, 'varies', [])
+        if varies:
+            patch_vary_headers(response, varies)
+        if self._meta.cache.cacheable(request, response) and self._meta.cache.cache_control():
+            patch_cache_control(response, **self._meta.cache.cache_control())
+        raise ImmediateHttpResponse(response=response)
+
     def alter_detail_data_to_serialize(self, request, data):
         """
         Add message to data.
@@ -305,8 +970,9 @@ class CourtLocationResource(JailResource):
         limit = 100
         max_limit = 0
         if use_caching():
-            cache = SimpleCache(timeout=cache_ttl())
+            cache = JailCache(timeout=cache_ttl())
         serializer = JailSerializer()
+        paginator_class = JailPaginator
         filtering = {
             LOCATION: ALL,
         }
@@ -317,9 +983,9 @@ class CourtLocationResource(JailResource):
         """
         if request_path_starts_with(bundle, COURT_LOCATION_URL) and \
                 (bundle.request.path != COURT_LOCATION_URL or
-                 has_related_request(bundle)):
+                 has_related_request(bundle)) and self.shows_field(bundle.request, COURT_DATES):
             dates = bundle.obj.court_dates.all()
-            resource = CourtDateResource()
+            resource = CourtDateResource.nested()
             bundle.data[COURT_DATES] = []
             for court_date in dates:
                 date_bundle = resource.build_bundle(obj=court_date, request=bundle.request)
@@ -335,14 +1001,17 @@ class CourtDateResource(JailResource):
     location = JailToOneField(CourtLocationResource, LOCATION, null=True, full=False)
     inmate = JailToOneField(COUNTY_API_INMATE_RESOURCE, INMATE, null=True, full=False)
 
+    flat_list_extras = ((LOCATION_ID, LOCATION), (LOCATION, 'location__location'), (INMATE_JAIL_ID, INMATE))
+
     class Meta:
-        queryset = CourtDate.objects.select_related(LOCATION).select_related(INMATE).all()
+        queryset = CourtDate.objects.select_related(LOCATION, INMATE).all()
         allowed_methods = [GET]
         limit = 100
         max_limit = 0
         if use_caching():
-            cache = SimpleCache(timeout=cache_ttl())
+            cache = JailCache(timeout=cache_ttl())
         serializer = JailSerializer()
+        paginator_class = JailPaginator
         filtering = {
             DATE: ALL,
             LOCATION: ALL_WITH_RELATIONS,
@@ -362,27 +1031,27 @@ class CourtDateResource(JailResource):
         # Include location when called from inmate
         if request_path_starts_with(bundle, COUNTY_INMATE_URL):
             location = bundle.obj.location
-            resource = CourtLocationResource()
+            resource = CourtLocationResource.nested()
             location_bundle = resource.build_bundle(obj=location, request=bundle.request)
             bundle.data[LOCATION] = resource.full_dehydrate(location_bundle, for_list=for_list).data
 
         # Include primary keys on court dates
         if request_path_starts_with(bundle, COURT_DATE_URL) and not has_related_request(bundle):
-            bundle.data[LOCATION_ID] = bundle.obj.location.pk
-            bundle.data[LOCATION] = bundle.obj.location.location
-            bundle.data[INMATE_JAIL_ID] = bundle.obj.inmate.pk
+            self.add_flat_list_extras(bundle)
 
         # Include full inmate in related query
         if request_path_starts_with(bundle, COURT_DATE_URL) and has_related_request(bundle):
-            inmate = bundle.obj.inmate
-            resource = CountyInmateResource()
-            inmate_bundle = resource.build_bundle(obj=inmate, request=bundle.request)
-            bundle.data[INMATE] = resource.full_dehydrate(inmate_bundle, for_list=for_list).data
-
-            location = bundle.obj.location
-            resource = CourtLocationResource()
-            location_bundle = resource.build_bundle(obj=location, request=bundle.request)
-            bundle.data[LOCATION] = resource.full_dehydrate(location_bundle, for_list=for_list).data
+            if self.shows_field(bundle.request, INMATE):
+                inmate = bundle.obj.inmate
+                resource = CountyInmateResource.nested()
+                inmate_bundle = resource.build_bundle(obj=inmate, request=bundle.request)
+                bundle.data[INMATE] = resource.full_dehydrate(inmate_bundle, for_list=for_list).data
+
+            if self.shows_field(bundle.request, LOCATION):
+                location = bundle.obj.location
+                resource = CourtLocationResource.nested()
+                location_bundle = resource.build_bundle(obj=location, request=bundle.request)
+                bundle.data[LOCATION] = resource.full_dehydrate(location_bundle, for_list=for_list).data
 
         return bundle
 
@@ -398,8 +1067,9 @@ class HousingLocationResource(JailResource):
         limit = 100
         max_limit = 0
         if use_caching():
-            cache = SimpleCache(timeout=cache_ttl())
+            cache = JailCache(timeout=cache_ttl())
         serializer = JailSerializer()
+        paginator_class = JailPaginator
         filtering = {
             HOUSING_LOCATION: ALL,
             'division': ALL,
@@ -419,14 +1089,19 @@ class HousingHistoryResource(JailResource):
     housing_location = JailToOneField(HousingLocationResource, HOUSING_LOCATION, null=True, full=False)
     inmate = JailToOneField(COUNTY_API_INMATE_RESOURCE, INMATE, null=True, full=False)
 
+    flat_list_extras = ((LOCATION_ID, HOUSING_LOCATION), (INMATE_JAIL_ID, INMATE))
+
+    cursor_ordering = 'id'
+
     class Meta:
-        queryset = HousingHistory.objects.select_related(LOCATION).select_related(INMATE).all()
+        queryset = HousingHistory.objects.select_related(HOUSING_LOCATION, INMATE).all()
         allowed_methods = [GET]
         serializer = JailSerializer()
+        paginator_class = JailPaginator
         limit = 100
         max_limit = 0
         if use_caching():
-            cache = SimpleCache(timeout=cache_ttl())
+            cache = JailCache(timeout=cache_ttl())
         filtering = {
             INMATE: ALL_WITH_RELATIONS,
             HOUSING_DATE_DISCOVERED: ALL,
@@ -446,28 +1121,29 @@ class HousingHistoryResource(JailResource):
         # Include location when called from inmate
         if request_path_starts_with(bundle, COUNTY_INMATE_URL):
             location = bundle.obj.housing_location
-            resource = HousingLocationResource()
+            resource = HousingLocationResource.nested()
             location_bundle = resource.build_bundle(obj=location, request=bundle.request)
             bundle.data[HOUSING_LOCATION] = resource.full_dehydrate(location_bundle, for_list=for_list).data
 
         # Include primary keys on court dates
         if request_path_starts_with(bundle, HOUSING_HISTORY_URL) and not \
                 has_related_request(bundle):
-            bundle.data[LOCATION_ID] = bundle.obj.housing_location.pk
-            bundle.data[INMATE_JAIL_ID] = bundle.obj.inmate.pk
+            self.add_flat_list_extras(bundle)
 
         # Include full inmate in related query
         if request_path_starts_with(bundle, HOUSING_HISTORY_URL) and \
                 has_related_request(bundle):
-            inmate = bundle.obj.inmate
-            resource = CountyInmateResource()
-            inmate_bundle = resource.build_bundle(obj=inmate, request=bundle.request)
-            bundle.data[INMATE] = resource.full_dehydrate(inmate_bundle, for_list=for_list).data
-
-            location = bundle.obj.housing_location
-            resource = HousingLocationResource()
-            location_bundle = resource.build_bundle(obj=location, request=bundle.request)
-            bundle.data[HOUSING_LOCATION] = resource.full_dehydrate(location_bundle, for_list=for_list).data
+            if self.shows_field(bundle.request, INMATE):
+                inmate = bundle.obj.inmate
+                resource = CountyInmateResource.nested()
+                inmate_bundle = resource.build_bundle(obj=inmate, request=bundle.request)
+                bundle.data[INMATE] = resource.full_dehydrate(inmate_bundle, for_list=for_list).data
+
+            if self.shows_field(bundle.request, HOUSING_LOCATION):
+                location = bundle.obj.housing_location
+                resource = HousingLocationResource.nested()
+                location_bundle = resource.build_bundle(obj=location, request=bundle.request)
+                bundle.data[HOUSING_LOCATION] = resource.full_dehydrate(location_bundle, for_list=for_list).data
 
         return bundle
 
@@ -478,14 +1154,17 @@ class ChargesHistoryResource(JailResource):
     """
     inmate = JailToOneField(COUNTY_API_INMATE_RESOURCE, INMATE, null=True, full=False)
 
+    flat_list_extras = ((INMATE_JAIL_ID, INMATE),)
+
     class Meta:
         queryset = ChargesHistory.objects.select_related(INMATE).all()
         allowed_methods = [GET]
         serializer = JailSerializer()
+        paginator_class = JailPaginator
         limit = 100
         max_limit = 0
         if use_caching():
-            cache = SimpleCache(timeout=cache_ttl())
+            cache = JailCache(timeout=cache_ttl())
         filtering = {
             INMATE: ALL_WITH_RELATIONS,
             'charges': ALL,
@@ -503,12 +1182,13 @@ class ChargesHistoryResource(JailResource):
         # Include primary keys on court dates
         related_request = has_related_request(bundle)
         if request_path_starts_with(bundle, CHARGES_HISTORY_URL) and not related_request:
-            bundle.data[INMATE_JAIL_ID] = bundle.obj.inmate.pk
+            self.add_flat_list_extras(bundle)
 
         # Include full inmate in related query
-        if request_path_starts_with(bundle, HOUSING_HISTORY_URL) and related_request:
+        if request_path_starts_with(bundle, HOUSING_HISTORY_URL) and related_request and \
+                self.shows_field(bundle.request, INMATE):
             inmate = bundle.obj.inmate
-            resource = CountyInmateResource()
+            resource = CountyInmateResource.nested()
             inmate_bundle = resource.build_bundle(obj=inmate, request=bundle.request)
             bundle.data[INMATE] = resource.full_dehydrate(inmate_bundle, for_list=for_list).data
 
@@ -523,17 +1203,26 @@ class CountyInmateResource(JailResource):
     housing_history = JailToManyField(HousingHistoryResource, HOUSING_HISTORY)
     charges_history = JailToManyField(ChargesHistoryResource, CHARGES_HISTORY)
 
+    flat_list_extras = ()
+
+    cursor_ordering = '-jail_id'
+
+    # The full lists scripts/scraper.sh used to prime the cache with
+    list_exports = {
+        'json': {'format': 'json', 'limit': '0'},
+        'jsonp': {'format': 'jsonp', 'limit': '0', CALLBACK: 'processJSONP'},
+        'csv': {'format': 'csv', 'limit': '0'},
+    }
+
     class Meta:
-        queryset = CountyInmate.objects.select_related(HOUSING_HISTORY)\
-                                       .select_related(CHARGES_HISTORY)\
-                                       .select_related(COURT_DATES)\
-                                       .all()
+        queryset = CountyInmate.objects.all()
         allowed_methods = [GET]
         limit = 100
         max_limit = 0
         if use_caching():
-            cache = SimpleCache(timeout=cache_ttl())
+            cache = JailCache(timeout=cache_ttl())
         serializer = JailSerializer()
+        paginator_class = JailPaginator
         list_allowed_methods = STD_HTTP_COMMANDS
         detail_allowed_methods = STD_HTTP_COMMANDS
         authorization = JailAuthorization()
@@ -557,35 +1246,17 @@ class CountyInmateResource(JailResource):
         }
         ordering = filtering.keys()
 
-    def dehydrate(self, bundle, for_list=False):
+    def get_object_list(self, request):
         """
-        Show court dates and housing history in inmate lists and detail views.
+        When the inmates' court dates, housing history and charges are going to be shown, fetch them and their
+        locations up front, so it takes a fixed number of queries no matter how many inmates are returned.
+        Histories left out by a fields parameter are not fetched.
         """
-        if request_path_starts_with(bundle, COUNTY_INMATE_URL) and \
-                (bundle.request.path != COUNTY_INMATE_URL or
-                 has_related_request(bundle)):
-            dates = bundle.obj.court_dates.all()
-            resource = CourtDateResource()
-            bundle.data[COURT_DATES] = []
-            for court_date in dates:
-                date_bundle = resource.build_bundle(obj=court_date, request=bundle.request)
-                bundle.data[COURT_DATES].append(resource.full_dehydrate(date_bundle, for_list=for_list).data)
-
-            housings = bundle.obj.housing_history.all()
-            resource = HousingHistoryResource()
-            bundle.data[HOUSING_HISTORY] = []
-            for housing in housings:
-                date_bundle = resource.build_bundle(obj=housing, request=bundle.request)
-                bundle.data[HOUSING_HISTORY].append(resource.full_dehydrate(date_bundle, for_list=for_list).data)
-
-            charges = bundle.obj.charges_history.all()
-            resource = ChargesHistoryResource()
-            bundle.data[CHARGES_HISTORY] = []
-            for charge in charges:
-                date_bundle = resource.build_bundle(obj=charge, request=bundle.request)
-                bundle.data[CHARGES_HISTORY].append(resource.full_dehydrate(date_bundle, for_list=for_list).data)
-
-        return bundle
+        object_list = super(CountyInmateResource, self).get_object_list(request)
+        if shows_inmate_histories(request):
+            object_list = object_list.prefetch_related(*[lookup for field_name, lookup in INMATE_HISTORIES
+                                                         if self.shows_field(request, field_name)])
+        return object_list
 
 
 class DailyPopulationCountsResource(JailResource):
@@ -597,8 +1268,9 @@ class DailyPopulationCountsResource(JailResource):
         queryset = DailyPopulationCounts.objects.all()
         max_limit = 0
         if use_caching():
-            cache = SimpleCache(timeout=cache_ttl())
+            cache = JailCache(timeout=cache_ttl())
         serializer = JailSerializer()
+        paginator_class = JailPaginator
         filtering = {
             BOOKING_DATE: ALL
         }
@@ -614,17 +1286,297 @@ class DailyBookingsCountsResource(JailResource):
         queryset = DailyBookingsCounts.objects.all()
         max_limit = 0
         if use_caching():
-            cache = SimpleCache(timeout=cache_ttl())
+            cache = JailCache(timeout=cache_ttl())
         serializer = JailSerializer()
+        paginator_class = JailPaginator
         filtering = {
             BOOKING_DATE: ALL
         }
         ordering = filtering.keys()
 
 
+class DailyHousingOccupancyResource(JailResource):
+    """
+    API endpoint for DailyHousingOccupancy
+    """
+
+    flat_list_extras = ()
+
+    class Meta:
+        queryset = DailyHousingOccupancy.objects.all()
+        allowed_methods = [GET]
+        max_limit = 0
+        if use_caching():
+            cache = JailCache(timeout=cache_ttl())
+        serializer = JailSerializer()
+        paginator_class = JailPaginator
+        filtering = {
+            DATE: ALL,
+            'division': ALL,
+            'sub_division': ALL,
+        }
+        ordering = filtering.keys()
+
+
+class StatsResource(JailResource):
+    """
+    API endpoint for population statistics: inmate counts, age bands and bail percentiles grouped by the
+    comma separated dimensions parameter, see countyapi/stats.py. The inmates can be filtered the same way as
+    the inmate list. Responses are cached until the data changes.
+    """
+
+    class Meta:
+        queryset = CountyInmate.objects.all()
+        resource_name = 'stats'
+        list_allowed_methods = [GET]
+        detail_allowed_methods = []
+        if use_caching():
+            cache = JailCache(timeout=cache_ttl())
+        serializer = JailSerializer()
+        filtering = {
+            BOOKING_DATE: ALL,
+            'discharge_date_earliest': ALL,
+            'gender': ALL,
+            'race': ALL,
+            'age_at_booking': ALL,
+            'bail_amount': ALL,
+            'in_jail': ALL,
+        }
+
+    def get_list(self, request, **kwargs):
+        dimensions = parse_dimensions(request.GET.get(DIMENSIONS))
+        base_bundle = self.build_bundle(request=request)
+        inmates = self.obj_get_list(bundle=base_bundle, **self.remove_api_resource_names(kwargs))
+        objects = population_stats(inmates, dimensions)
+        if self.determine_format(request) == TEXT_CSV:
+            rows = self._meta.serializer.iter_csv(objects, columns=stats_columns(dimensions))
+            response = HttpResponse(''.join(rows), content_type=build_content_type(TEXT_CSV))
+            response['Content-Disposition'] = CSV_CONTENT_DISPOSITION
+            return response
+        data = {
+            META: {DIMENSIONS: dimensions, 'total_count': len(objects)},
+            OBJECTS: objects,
+        }
+        return self.create_response(request, self.alter_list_data_to_serialize(request, data))
+
+
+class PopulationResource(JailResource):
+    """
+    API endpoint for the number of inmates in custody on a date, or on each day from start_date to end_date,
+    in total and in each housing division. ids=true adds the inmates' jail ids. The counts come from in-process
+    indexes rather than queries, see countyapi/population.py.
+    """
+
+    class Meta:
+        queryset = CountyInmate.objects.all()
+        resource_name = 'population'
+        list_allowed_methods = [GET]
+        detail_allowed_methods = []
+        if use_caching():
+            cache = JailCache(timeout=cache_ttl())
+        serializer = JailSerializer()
+
+    def get_list(self, request, **kwargs):
+        if DATE in request.GET:
+            start_date = end_date = parse_date_param(request, DATE)
+        elif START_DATE in request.GET and END_DATE in request.GET:
+            start_date, end_date = parse_date_param(request, START_DATE), parse_date_param(request, END_DATE)
+        else:
+            raise BadRequest('Please provide a date, or a start_date and an end_date.')
+        with_ids = request.GET.get(IDS, '').lower() in ('1', 'true')
+        number_days = (end_date - start_date).days + 1
+        max_days = MAX_POPULATION_DAYS_WITH_IDS if with_ids else MAX_POPULATION_DAYS
+        if not 0 < number_days <= max_days:
+            raise BadRequest('The end_date must be on or after the start_date and at most %d days later.' %
+                             (max_days - 1))
+        population = current_population()
+        objects = [population.on(start_date + timedelta(days=day), with_ids) for day in range(number_days)]
+        if self.determine_format(request) == TEXT_CSV:
+            if with_ids:
+                for obj in objects:
+                    obj[JAIL_IDS] = ' '.join(obj[JAIL_IDS])
+            rows = self._meta.serializer.iter_csv(objects, columns=population.columns(with_ids))
+            response = HttpResponse(''.join(rows), content_type=build_content_type(TEXT_CSV))
+            response['Content-Disposition'] = CSV_CONTENT_DISPOSITION
+            return response
+        data = {
+            META: {START_DATE: start_date, END_DATE: end_date, 'total_count': len(objects)},
+            OBJECTS: objects,
+        }
+        return self.create_response(request, self.alter_list_data_to_serialize(request, data))
+
+
+class TimeSeriesResource(JailResource):
+    """
+    API endpoint for the daily population and bookings counts as columns: the dates once and then a list of
+    counts for each column, optionally from start_date and up to end_date. series picks some of the series,
+    comma separated. It is answered from in-memory arrays, see countyapi/timeseries.py.
+    """
+
+    class Meta:
+        queryset = DailyPopulationCounts.objects.all()
+        resource_name = 'timeseries'
+        list_allowed_methods = [GET]
+        detail_allowed_methods = []
+        if use_caching():
+            cache = JailCache(timeout=cache_ttl())
+        serializer = JailSerializer()
+
+    def get_list(self, request, **kwargs):
+        if self.determine_format(request) == TEXT_CSV:
+            raise BadRequest('Time series are not available as CSV, please use the daily counts resources.')
+        series_names = sorted(SERIES)
+        if request.GET.get(SERIES_PARAM):
+            series_names = [name.strip() for name in request.GET[SERIES_PARAM].split(',') if name.strip()]
+            for name in series_names:
+                if name not in SERIES:
+                    raise BadRequest("Invalid series '%s' provided. Please provide series from: %s." %
+                                     (name, ', '.join(sorted(SERIES))))
+        start_date = parse_date_param(request, START_DATE) if START_DATE in request.GET else None
+        end_date = parse_date_param(request, END_DATE) if END_DATE in request.GET else None
+        data = {
+            META: {START_DATE: start_date, END_DATE: end_date},
+            SERIES_PARAM: dict((name, time_series(name).between(start_date, end_date)) for name in series_names),
+        }
+        return self.create_response(request, self.alter_list_data_to_serialize(request, data))
+
+
+class DatasetResource(JailResource):
+    """
+    API endpoint for the typed bulk download of the whole dataset that the write_dataset command writes, see
+    countyapi/dataset.py. The list is of the dataset's files, and the file parameter sends one of them.
+    """
+
+    class Meta:
+        queryset = CountyInmate.objects.all()
+        resource_name = 'dataset'
+        list_allowed_methods = [GET]
+        detail_allowed_methods = []
+        if use_caching():
+            cache = JailCache(timeout=cache_ttl())
+        serializer = JailSerializer()
+
+    def get_list(self, request, **kwargs):
+        dataset_dir = os.path.join(settings.EXPORTS_DIR, DATASET_DIR)
+        files = [(name, table) for name, table in dataset_files() if os.path.exists(os.path.join(dataset_dir, name))]
+        if request.GET.get(FILE):
+            name = request.GET[FILE]
+            if name not in dict(files):
+                raise BadRequest("Invalid file '%s' provided. Please provide a file from: %s." %
+                                 (name, ', '.join(name for name, _ in files)))
+            response = self.file_response(request, os.path.join(dataset_dir, name),
+                                          DATASET_CONTENT_TYPES[dataset_format()])
+            response['Content-Disposition'] = 'attachment; filename="%s"' % name
+            return self.streaming_response(request, response)
+        objects = []
+        for name, table in files:
+            path = os.path.join(dataset_dir, name)
+            objects.append({
+                FILE: name,
+                'table': table,
+                'format': dataset_format(),
+                'size': os.path.getsize(path),
+                'written': datetime.fromtimestamp(os.path.getmtime(path)),
+                RESOURCE_URI: '%s?%s=%s' % (DATASET_URL, FILE, name),
+            })
+        data = {META: {'total_count': len(objects)}, OBJECTS: objects}
+        return self.create_response(request, self.alter_list_data_to_serialize(request, data))
+
+
+def parse_date_param(request, param):
+    try:
+        return datetime.strptime(request.GET[param], '%Y-%m-%d').date()
+    except ValueError:
+        raise BadRequest("Invalid %s '%s' provided. Please provide a date as YYYY-MM-DD." %
+                         (param, request.GET[param]))
+
+
+def format_content_type(desired_format):
+    """
+    The Content-Type of a response in the format, tastypie's build_content_type adds a charset to every format
+    but JSON and JSONP, which MessagePack, being binary, has none of.
+    """
+    if desired_format == APPLICATION_MSGPACK:
+        return desired_format
+    return build_content_type(desired_format)
+
+
+def buffered(chunks):
+    """
+    Joins small chunks of streamed output together, so each write to the client carries at least
+    STREAMING_BUFFER_SIZE characters.
+    """
+    pending = []
+    pending_size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= STREAMING_BUFFER_SIZE:
+            yield ''.join(pending)
+            pending = []
+            pending_size = 0
+    if pending:
+        yield ''.join(pending)
+
+
+def iterate_objects(objects):
+    """
+    Iterates over a queryset without keeping its results around. QuerySet.iterator() skips prefetch_related,
+    so a queryset with prefetched relations is instead read STREAMING_CHUNK_SIZE objects at a time.
+    """
+    if not getattr(objects, '_prefetch_related_lookups', None):
+        for obj in objects.iterator():
+            yield obj
+        return
+    start = 0
+    while True:
+        chunk = list(objects[start:start + STREAMING_CHUNK_SIZE])
+        for obj in chunk:
+            yield obj
+        if len(chunk) < STREAMING_CHUNK_SIZE:
+            return
+        start += STREAMING_CHUNK_SIZE
+
+
+def uri_converter(resource):
+    """
+    Converts primary keys to the resource's detail URIs, the URI is reversed once and the primary key put in it.
+    The primary key is quoted with iri_to_uri, as Django's reverse quotes the URIs it makes, since some, like
+    the housing locations', have spaces.
+    """
+    uri = ModelResource.get_resource_uri(resource, resource._meta.object_class(pk=URI_PK_PLACEHOLDER))
+    if URI_PK_PLACEHOLDER not in uri:
+        return lambda pk: None if pk is None else uri
+    prefix, suffix = uri.split(URI_PK_PLACEHOLDER)
+    return lambda pk: None if pk is None else prefix + iri_to_uri(force_text(pk)) + suffix
+
+
+def not_modified(request, etag, last_modified):
+    """
+    Works out if the client's copy is still current, If-None-Match taking precedence over If-Modified-Since.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return etag in etags or '*' in etags
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE'))
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+def add_validators(response, etag, last_modified):
+    if response.status_code == 200 or response.status_code == 304:
+        response['ETag'] = quote_etag(etag)
+        response['Last-Modified'] = http_date(last_modified)
+
+
 def has_related_request(bundle):
     return bundle.request.REQUEST.get(RELATED) == '1'
 
 
 def request_path_starts_with(bundle, url):
     return bundle.request.path.startswith(url)
+
+
+def shows_inmate_histories(request):
+    return request.path.startswith(COUNTY_INMATE_URL) and \
+        (request.path != COUNTY_INMATE_URL or request.REQUEST.get(RELATED) == '1')
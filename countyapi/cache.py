@@ -0,0 +1,69 @@
+"""
+The API cache is shared by the gunicorn workers and the scraper. Everything in it belongs to a data generation,
+which the scraper bumps when it has changed the data, so cached entries last exactly as long as the data they
+were made from. Bumping the generation clears the cache, so it only ever holds the current generation's entries.
+"""
+
+import os
+from time import time
+
+from django.conf import settings
+from django.core.cache import get_cache
+from tastypie.cache import SimpleCache
+
+API_CACHE = 'api'
+
+
+def data_generation():
+    """
+    The current data generation, the time in milliseconds it was last bumped at. If it has been lost a new one
+    is started, which only means the cache starts out empty.
+    """
+    generation = read_data_generation()
+    if generation is None:
+        generation = bump_data_generation()
+    return generation
+
+
+def read_data_generation():
+    try:
+        with open(settings.DATA_GENERATION_FILE, 'rb') as generation_file:
+            return int(generation_file.read())
+    except (IOError, ValueError):
+        return None
+
+
+def bump_data_generation():
+    """
+    Starts a new data generation and clears the API cache of the entries of the earlier ones. The generation
+    file is replaced in one rename, so the API never reads a partly written one.
+    """
+    generation = int(time() * 1000)
+    previous_generation = read_data_generation()
+    if previous_generation is not None and generation <= previous_generation:
+        generation = previous_generation + 1
+    generation_dir = os.path.dirname(settings.DATA_GENERATION_FILE)
+    if not os.path.isdir(generation_dir):
+        os.makedirs(generation_dir)
+    temporary_path = '%s.%d.tmp' % (settings.DATA_GENERATION_FILE, os.getpid())
+    with open(temporary_path, 'wb') as generation_file:
+        generation_file.write(str(generation))
+    os.rename(temporary_path, settings.DATA_GENERATION_FILE)
+    get_cache(API_CACHE).clear()
+    return generation
+
+
+class JailCache(SimpleCache):
+    """
+    tastypie cache kept in the shared API cache under the current data generation. Entries are stored for as
+    long as the API cache's TIMEOUT while the timeout given here is only used for the Cache-Control max-age.
+    """
+
+    def __init__(self, timeout=None, public=None, private=None, *args, **kwargs):
+        super(JailCache, self).__init__(API_CACHE, timeout, public, private, *args, **kwargs)
+
+    def get(self, key, **kwargs):
+        return self.cache.get(key, version=data_generation(), **kwargs)
+
+    def set(self, key, value, timeout=None):
+        self.cache.set(key, value, timeout or self.cache.default_timeout, version=data_generation())
@@ -0,0 +1,105 @@
+"""
+Content-Encoding of the API's responses, negotiated from the request's Accept-Encoding in JailResource.dispatch
+rather than by GZipMiddleware, so cached responses are kept compressed and are not compressed again each time
+they are sent. gzip is always available, brotli when the brotli module is installed.
+"""
+
+import zlib
+
+from django.utils.cache import patch_vary_headers
+
+from countyapi.exports import BROTLI_SUFFIX, GZIP_SUFFIX, brotli
+
+GZIP = 'gzip'
+
+BROTLI = 'br'
+
+# Encodings in the order they are preferred, with the suffix of the exports' precompressed copies
+ENCODING_SUFFIXES = ((BROTLI, BROTLI_SUFFIX), (GZIP, GZIP_SUFFIX))
+
+# Compressing anything shorter saves less than the Content-Encoding header costs
+MIN_COMPRESSED_LENGTH = 200
+
+# Cached responses are compressed once and sent many times, so they get the best compression
+CACHED_GZIP_LEVEL = 9
+
+CACHED_BROTLI_QUALITY = 11
+
+# Streamed responses are compressed as they are sent
+STREAMING_GZIP_LEVEL = 6
+
+STREAMING_BROTLI_QUALITY = 5
+
+# zlib writes a gzip header and trailer for window bits over 16
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def accepted_encoding(request):
+    """
+    The encoding to send the response to the request in, None when it should be sent as it is.
+    """
+    qualities = {}
+    for coding in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        params = coding.split(';')
+        quality = 1.0
+        for param in params[1:]:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[params[0].strip().lower()] = quality
+    for encoding, _ in ENCODING_SUFFIXES:
+        if (encoding != BROTLI or brotli is not None) and qualities.get(encoding, qualities.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def encoding_suffix(encoding):
+    return dict(ENCODING_SUFFIXES)[encoding]
+
+
+def compress(content, encoding):
+    if encoding == BROTLI:
+        return brotli.compress(content, quality=CACHED_BROTLI_QUALITY)
+    compressor = zlib.compressobj(CACHED_GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+    return compressor.compress(content) + compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    """
+    Compresses streamed chunks, flushing the compressor after each one so the client is sent as much as has
+    been written. The chunks are already buffered into large ones, so the flushes cost little compression.
+    """
+    if encoding == BROTLI:
+        compressor = brotli.Compressor(quality=STREAMING_BROTLI_QUALITY)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(STREAMING_GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+
+def encode_response(response, encoding):
+    """
+    Compresses a successful response in the encoding, in place. Responses that already have a Content-Encoding,
+    such as the precompressed copies of exports, are left as they are, and so are short ones.
+    """
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if encoding is None or response.status_code != 200 or response.has_header('Content-Encoding'):
+        return response
+    if response.streaming:
+        response.streaming_content = compress_stream(response.streaming_content, encoding)
+        if response.has_header('Content-Length'):
+            del response['Content-Length']
+    else:
+        if len(response.content) < MIN_COMPRESSED_LENGTH:
+            return response
+        response.content = compress(response.content, encoding)
+        response['Content-Length'] = str(len(response.content))
+    response['Content-Encoding'] = encoding
+    return response
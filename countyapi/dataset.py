@@ -0,0 +1,192 @@
+"""
+Typed bulk download of the whole dataset, written by the write_dataset command and sent by DatasetResource in
+countyapi/api.py. When pyarrow is installed each table is written to a Parquet file. Without it the tables are
+written to one SQLite database instead, which keeps the columns' types, can be read a column at a time by
+SQLite clients, pandas or R, and is sent gzip compressed.
+"""
+
+import os
+import sqlite3
+
+from countyapi.exports import TEMPORARY_SUFFIX, ExportFile
+from countyapi.models import ChargesHistory, CountyInmate, CourtDate, CourtLocation, HousingHistory, \
+    HousingLocation
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+DATASET_DIR = 'dataset'
+
+PARQUET = 'parquet'
+
+SQLITE = 'sqlite3'
+
+SQLITE_NAME = 'cookcountyjail.sqlite3'
+
+DATASET_CONTENT_TYPES = {
+    PARQUET: 'application/vnd.apache.parquet',
+    SQLITE: 'application/vnd.sqlite3',
+}
+
+DATASET_MODELS = (CountyInmate, HousingLocation, HousingHistory, CourtLocation, CourtDate, ChargesHistory)
+
+# Rows read from the database at a time, each batch is a row group of the Parquet files
+BATCH_SIZE = 10000
+
+STRING = 'string'
+
+INTEGER = 'integer'
+
+BOOLEAN = 'boolean'
+
+DATE = 'date'
+
+TIMESTAMP = 'timestamp'
+
+# Column type of each Django field type
+FIELD_TYPES = {
+    'AutoField': INTEGER,
+    'BooleanField': BOOLEAN,
+    'CharField': STRING,
+    'DateField': DATE,
+    'DateTimeField': TIMESTAMP,
+    'IntegerField': INTEGER,
+    'TextField': STRING,
+}
+
+# The declared SQLite types, sqlite3's PARSE_DECLTYPES reads dates and timestamps back as such
+SQLITE_TYPES = {
+    STRING: 'TEXT',
+    INTEGER: 'INTEGER',
+    BOOLEAN: 'BOOLEAN',
+    DATE: 'DATE',
+    TIMESTAMP: 'TIMESTAMP',
+}
+
+
+def dataset_format():
+    return PARQUET if pyarrow is not None else SQLITE
+
+
+def table_name(model):
+    return model._meta.module_name
+
+
+def dataset_columns(model):
+    """
+    The table's (column, type) pairs, a foreign key column is named after its attribute and has the type of the
+    field it refers to.
+    """
+    columns = []
+    for field in model._meta.local_fields:
+        type_field = field.rel.get_related_field() if field.rel else field
+        columns.append((field.attname, FIELD_TYPES[type_field.get_internal_type()]))
+    return columns
+
+
+def table_batches(model):
+    """
+    Generates the table's rows, ordered by primary key, in lists of BATCH_SIZE, reading them in one pass.
+    """
+    columns = [column for column, _ in dataset_columns(model)]
+    batch = []
+    for row in model.objects.order_by(model._meta.pk.attname).values_list(*columns).iterator():
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def dataset_files():
+    """
+    The (file name, table) pairs of the dataset files written in the current format, table being None for the
+    SQLite database, which holds all of them.
+    """
+    if dataset_format() == PARQUET:
+        return [('%s.%s' % (table_name(model), PARQUET), table_name(model)) for model in DATASET_MODELS]
+    return [(SQLITE_NAME, None)]
+
+
+def write_dataset(dataset_dir):
+    """
+    Writes every table of the dataset to dataset_dir, replacing the files already there once they are written.
+    @return the number of rows written to each table, by table name
+    """
+    if not os.path.isdir(dataset_dir):
+        os.makedirs(dataset_dir)
+    if dataset_format() == PARQUET:
+        return dict((table_name(model), write_parquet_table(model, os.path.join(dataset_dir, file_name)))
+                    for model, (file_name, _) in zip(DATASET_MODELS, dataset_files()))
+    return write_sqlite_dataset(os.path.join(dataset_dir, SQLITE_NAME))
+
+
+def write_parquet_table(model, path):
+    arrow_types = {
+        STRING: pyarrow.string(),
+        INTEGER: pyarrow.int64(),
+        BOOLEAN: pyarrow.bool_(),
+        DATE: pyarrow.date32(),
+        TIMESTAMP: pyarrow.timestamp('us'),
+    }
+    schema = pyarrow.schema([pyarrow.field(column, arrow_types[column_type])
+                             for column, column_type in dataset_columns(model)])
+    writer = pyarrow.parquet.ParquetWriter(path + TEMPORARY_SUFFIX, schema, compression='snappy')
+    number_rows = 0
+    try:
+        for batch in table_batches(model):
+            arrays = [pyarrow.array(list(values), type=field.type) for values, field in zip(zip(*batch), schema)]
+            writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+            number_rows += len(batch)
+    except Exception:
+        writer.close()
+        os.remove(path + TEMPORARY_SUFFIX)
+        raise
+    writer.close()
+    os.rename(path + TEMPORARY_SUFFIX, path)
+    return number_rows
+
+
+def write_sqlite_dataset(path):
+    """
+    Writes the tables to a new SQLite database, which is then copied to an ExportFile for its compressed copies.
+    """
+    database_path = path + '.db' + TEMPORARY_SUFFIX
+    if os.path.exists(database_path):
+        os.remove(database_path)
+    database = sqlite3.connect(database_path)
+    try:
+        number_rows = write_sqlite_tables(database)
+        database.close()
+        export_file = ExportFile(path)
+        try:
+            with open(database_path, 'rb') as database_file:
+                for data in iter(lambda: database_file.read(1024 * 1024), b''):
+                    export_file.write(data)
+        except Exception:
+            export_file.discard()
+            raise
+        export_file.close()
+    finally:
+        database.close()
+        os.remove(database_path)
+    return number_rows
+
+
+def write_sqlite_tables(database):
+    number_rows = {}
+    for model in DATASET_MODELS:
+        columns = dataset_columns(model)
+        database.execute('CREATE TABLE %s (%s)' % (table_name(model), ', '.join(
+            '%s %s' % (column, SQLITE_TYPES[column_type]) for column, column_type in columns)))
+        insert = 'INSERT INTO %s VALUES (%s)' % (table_name(model), ', '.join(['?'] * len(columns)))
+        number_rows[table_name(model)] = 0
+        for batch in table_batches(model):
+            database.executemany(insert, batch)
+            number_rows[table_name(model)] += len(batch)
+    database.commit()
+    return number_rows
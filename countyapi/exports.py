@@ -0,0 +1,130 @@
+"""
+Full API list exports, written to disk by the write_exports command and sent by the API in place of the matching
+list requests.
+"""
+
+import csv
+import gzip
+import os
+
+from django.test.client import RequestFactory
+from django.utils.encoding import force_bytes
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CALLBACK = 'callback'
+META = 'meta'
+TOTAL_COUNT = 'total_count'
+
+GZIP_SUFFIX = '.gz'
+BROTLI_SUFFIX = '.br'
+TEMPORARY_SUFFIX = '.tmp'
+
+
+class ExportFile(object):
+    """
+    Writes an export along with its gzip, and when the brotli module is installed brotli, compressed copies.
+    Everything is written to temporary files that replace the existing ones on close, so the API never sends
+    a partly written export.
+    """
+
+    def __init__(self, path):
+        self._paths = [path, path + GZIP_SUFFIX]
+        if brotli is not None:
+            self._paths.append(path + BROTLI_SUFFIX)
+        self._file = self._gzip_raw_file = self._gzip_file = self._brotli_file = self._brotli_compressor = None
+        # When a file can not be opened the ones already opened are closed and removed
+        try:
+            self._file = open(path + TEMPORARY_SUFFIX, 'wb')
+            self._gzip_raw_file = open(path + GZIP_SUFFIX + TEMPORARY_SUFFIX, 'wb')
+            self._gzip_file = gzip.GzipFile(os.path.basename(path), 'wb', 9, self._gzip_raw_file)
+            if brotli is not None:
+                self._brotli_file = open(path + BROTLI_SUFFIX + TEMPORARY_SUFFIX, 'wb')
+                self._brotli_compressor = brotli.Compressor()
+        except Exception:
+            self.discard()
+            raise
+
+    def write(self, data):
+        data = force_bytes(data)
+        self._file.write(data)
+        self._gzip_file.write(data)
+        if self._brotli_compressor:
+            self._brotli_file.write(self._brotli_compressor.process(data))
+
+    def close(self):
+        self._close_files()
+        for path in self._paths:
+            os.rename(path + TEMPORARY_SUFFIX, path)
+
+    def discard(self):
+        self._close_files()
+        for path in self._paths:
+            if os.path.exists(path + TEMPORARY_SUFFIX):
+                os.remove(path + TEMPORARY_SUFFIX)
+
+    def _close_files(self):
+        for open_file in (self._file, self._gzip_file, self._gzip_raw_file):
+            if open_file is not None:
+                open_file.close()
+        if self._brotli_compressor:
+            self._brotli_file.write(self._brotli_compressor.finish())
+            self._brotli_compressor = None
+        if self._brotli_file is not None:
+            self._brotli_file.close()
+
+
+def write_list_exports(resource, exports_dir):
+    """
+    Writes the resource's list exports in one pass over the database: each object is read once and written to
+    the CSV export, and to the JSON and JSONP exports, which only differ in the JSONP wrapping.
+    The exports are the same as the API's responses to their query strings.
+    @return the number of objects exported
+    """
+    serializer = resource._meta.serializer
+    files = {}
+    try:
+        for export_format in resource.list_exports:
+            files[export_format] = ExportFile(resource.export_path(export_format, exports_dir))
+        json_file, jsonp_file, csv_file = files.get('json'), files.get('jsonp'), files.get('csv')
+        params = resource.list_exports['json' if json_file else 'jsonp']
+        request = RequestFactory().get(resource.get_resource_uri(), params)
+        page = resource.list_page(request, resource.list_paginator(request))
+        if csv_file:
+            collection_name = resource._meta.collection_name
+            page[collection_name] = written_as_csv(serializer, page[collection_name], csv_file)
+        if jsonp_file:
+            jsonp_file.write(u'%s(' % resource.list_exports['jsonp'][CALLBACK])
+        for chunk in serializer.iter_json(page):
+            if json_file:
+                json_file.write(chunk)
+            if jsonp_file:
+                jsonp_file.write(serializer.jsonp_escape(chunk))
+        if jsonp_file:
+            jsonp_file.write(u')')
+    except Exception:
+        for export_file in files.values():
+            export_file.discard()
+        raise
+    for export_file in files.values():
+        export_file.close()
+    return page[META][TOTAL_COUNT]
+
+
+def written_as_csv(serializer, objects, export_file):
+    """
+    Passes the objects on, writing each one to the CSV export on the way, the same way JailSerializer.iter_csv
+    writes them, i.e. with a header row of the first object's keys.
+    """
+    writer = csv.writer(export_file)
+    header_written = False
+    for obj in objects:
+        item = serializer.to_simple(obj, {})
+        if not header_written:
+            writer.writerow(item.keys())
+            header_written = True
+        writer.writerow(item.values())
+        yield obj
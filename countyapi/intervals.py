@@ -0,0 +1,204 @@
+"""
+In-process index of half open [start, end) intervals over days, for stabbing queries such as who was in jail
+on a given day, answered without a scan of the inmates table. scripts/interval_index_benchmark.py compares it
+with the ORM query.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, time, timedelta
+
+from countyapi.models import CountyInmate
+
+# End of the intervals that have not ended yet, after every day there is
+OPEN_END = date.max.toordinal() + 1
+
+# The interval tree is rebuilt once more than this share of the intervals have changed since it was built
+REBUILD_FRACTION = 0.1
+
+# A refresh rereads the inmates saved this long before the last one started, so saves that were still being
+# committed then are not missed
+REFRESH_OVERLAP = timedelta(hours=1)
+
+
+def day_number(day):
+    """
+    The proleptic Gregorian ordinal of a date, or of a datetime's date, which is what the intervals are made of.
+    """
+    return day.toordinal()
+
+
+def custody_interval(booking_date, discharge_date_earliest):
+    """
+    The days an inmate was in custody, the same as the summaries count them: booked on or before the day and
+    not discharged by its midnight. None when the booking date is not known.
+    """
+    if booking_date is None:
+        return None
+    if discharge_date_earliest is None:
+        return day_number(booking_date), OPEN_END
+    end = day_number(discharge_date_earliest)
+    if discharge_date_earliest.time() != time():
+        end += 1
+    return day_number(booking_date), end
+
+
+class IntervalIndex(object):
+    """
+    Holds keyed [start, end) intervals, given as day numbers. The number of intervals containing a day is worked
+    out by bisecting sorted arrays of their starts and ends, and their keys are found with a centered interval
+    tree, so both take time logarithmic in the number of intervals plus the number of keys returned.
+    Intervals can be changed afterwards: the sorted arrays are kept up to date in place, while the tree is
+    checked against the changes made since it was built, until there are enough of them to rebuild it.
+    """
+
+    def __init__(self, intervals):
+        """
+        @param intervals (key, start, end) triples
+        """
+        self._intervals = dict((key, (start, end)) for key, start, end in intervals if start < end)
+        self._build()
+
+    def _build(self):
+        intervals = [(start, end, key) for key, (start, end) in self._intervals.iteritems()]
+        self._starts = array('l', sorted(start for start, _, _ in intervals))
+        self._ends = array('l', sorted(end for _, end, _ in intervals))
+        self._root = _IntervalNode.build(intervals)
+        # Keys changed since the tree was built and their interval, None for the removed ones
+        self._changed = {}
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def update(self, intervals):
+        """
+        Adds the (key, start, end) intervals, replacing the ones already held for their keys.
+        """
+        for key, start, end in intervals:
+            self._set(key, (start, end) if start < end else None)
+        self._rebuild_if_changed()
+
+    def remove(self, keys):
+        for key in keys:
+            self._set(key, None)
+        self._rebuild_if_changed()
+
+    def _set(self, key, interval):
+        previous_interval = self._intervals.get(key)
+        if interval == previous_interval:
+            return
+        if previous_interval is not None:
+            del self._starts[bisect_left(self._starts, previous_interval[0])]
+            del self._ends[bisect_left(self._ends, previous_interval[1])]
+            del self._intervals[key]
+        if interval is not None:
+            insort(self._starts, interval[0])
+            insort(self._ends, interval[1])
+            self._intervals[key] = interval
+        self._changed[key] = interval
+
+    def _rebuild_if_changed(self):
+        if len(self._changed) > REBUILD_FRACTION * len(self._intervals):
+            self._build()
+
+    def count_at(self, day):
+        day = day_number(day)
+        return bisect_right(self._starts, day) - bisect_right(self._ends, day)
+
+    def keys_at(self, day):
+        """
+        The keys of the intervals containing the day, in no particular order.
+        """
+        day = day_number(day)
+        keys = []
+        node = self._root
+        while node is not None:
+            if day < node.center:
+                # The node's intervals all end after its center, so those starting by the day contain it
+                keys.extend(node.start_keys[:bisect_right(node.starts, day)])
+                node = node.left
+            else:
+                # and they all start by its center, so those ending after the day contain it
+                keys.extend(node.end_keys[bisect_right(node.ends, day):])
+                node = node.right
+        if self._changed:
+            changed = self._changed
+            keys = [key for key in keys if key not in changed]
+            keys.extend(key for key, interval in changed.iteritems()
+                        if interval is not None and interval[0] <= day < interval[1])
+        return keys
+
+
+class _IntervalNode(object):
+    """
+    Node of a centered interval tree: the intervals containing its center, sorted by start and by end, with
+    the intervals ending by the center to its left and the ones starting after it to its right.
+    """
+    __slots__ = ('center', 'left', 'right', 'starts', 'start_keys', 'ends', 'end_keys')
+
+    @classmethod
+    def build(cls, intervals):
+        if not intervals:
+            return None
+        node = cls()
+        node.center = sorted(start for start, _, _ in intervals)[len(intervals) // 2]
+        centered, left, right = [], [], []
+        for interval in intervals:
+            start, end, _ = interval
+            if end <= node.center:
+                left.append(interval)
+            elif start > node.center:
+                right.append(interval)
+            else:
+                centered.append(interval)
+        centered.sort()
+        node.starts = array('l', (interval[0] for interval in centered))
+        node.start_keys = list(interval[2] for interval in centered)
+        centered.sort(key=lambda interval: interval[1])
+        node.ends = array('l', (interval[1] for interval in centered))
+        node.end_keys = list(interval[2] for interval in centered)
+        node.left = cls.build(left)
+        node.right = cls.build(right)
+        return node
+
+
+def inmate_custody_intervals(inmates=None):
+    """
+    Generates the jail_id and custody interval of each of the inmates, in one values_list pass over them.
+    The interval is None when the booking date is not known.
+    """
+    if inmates is None:
+        inmates = CountyInmate.objects.all()
+    for jail_id, booking_date, discharge_date_earliest in \
+            inmates.order_by().values_list('jail_id', 'booking_date', 'discharge_date_earliest').iterator():
+        yield jail_id, custody_interval(booking_date, discharge_date_earliest)
+
+
+class CustodyIndex(IntervalIndex):
+    """
+    IntervalIndex of the inmates' custody intervals keyed by jail_id, which is brought up to date by rereading
+    the inmates saved since it was built. Saving an inmate sets its last_seen_date, and the scraper saves every
+    inmate it books, finds discharged or sees again. Deleted inmates are only dropped by building a new index.
+    """
+
+    def __init__(self):
+        self.refreshed_at = datetime.now()
+        super(CustodyIndex, self).__init__((jail_id,) + interval
+                                           for jail_id, interval in inmate_custody_intervals()
+                                           if interval is not None)
+
+    def refresh(self):
+        """
+        Rereads the inmates saved since the last refresh started, less the REFRESH_OVERLAP.
+        """
+        refreshed_at = datetime.now()
+        saved_inmates = CountyInmate.objects.filter(last_seen_date__gte=self.refreshed_at - REFRESH_OVERLAP)
+        intervals, removed = [], []
+        for jail_id, interval in inmate_custody_intervals(saved_inmates):
+            if interval is None:
+                removed.append(jail_id)
+            else:
+                intervals.append((jail_id,) + interval)
+        self.update(intervals)
+        self.remove(removed)
+        self.refreshed_at = refreshed_at
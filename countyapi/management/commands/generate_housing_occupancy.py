@@ -0,0 +1,34 @@
+from datetime import date, datetime
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from countyapi.management.commands.generate_summaries import MIN_DATE
+from countyapi.occupancy import write_housing_occupancy
+
+
+class Command(BaseCommand):
+
+    help = "Write the daily housing occupancy of a period, by default everything since the summaries start."
+
+    option_list = BaseCommand.option_list + (
+        make_option('--start', action='store', dest='start', default=None,
+                    help='First day to write, as YYYY-MM-DD, defaults to the first day of the summaries.'),
+        make_option('--end', action='store', dest='end', default=None,
+                    help='Last day to write, as YYYY-MM-DD, defaults to today.'),
+    )
+
+    def handle(self, *args, **options):
+        first_day = self.parse_day(options['start']) if options['start'] else MIN_DATE.date()
+        last_day = self.parse_day(options['end']) if options['end'] else date.today()
+        start_time = datetime.now()
+        number_rows = write_housing_occupancy(first_day, last_day)
+        self.stdout.write("Wrote %d housing occupancy rows from %s to %s in %s." %
+                          (number_rows, first_day, last_day, str(datetime.now() - start_time)))
+
+    @staticmethod
+    def parse_day(value):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError("Invalid date '%s', please give it as YYYY-MM-DD." % value)
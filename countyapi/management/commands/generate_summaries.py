@@ -1,7 +1,10 @@
+from collections import defaultdict, namedtuple
 from datetime import datetime, timedelta
 from django.core.management.base import BaseCommand
+from countyapi.cache import bump_data_generation
+from countyapi.intervals import IntervalIndex, custody_interval
 from countyapi.models import CountyInmate, DailyPopulationCounts, DailyBookingsCounts
-from django.db.models import Max, Min, Q
+from django.db.models import Max, Min
 from copy import copy
 
 GENDER_LOOKUP = {
@@ -11,6 +14,9 @@ GENDER_LOOKUP = {
 
 MIN_DATE = datetime(2013, 1, 1)
 
+InmateSummary = namedtuple('InmateSummary', ['jail_id', 'gender', 'race', 'age_at_booking', 'booking_date',
+                                             'discharge_date_earliest'])
+
 class Command(BaseCommand):
 
     def daterange(self, start_date, end_date):
@@ -71,15 +77,16 @@ class Command(BaseCommand):
         booking_counts = {}
 
         min_date = MIN_DATE
-        max_date = CountyInmate.objects.all().aggregate(
-            Max('booking_date'))['booking_date__max'] + timedelta(days=1)
+        max_booking_date = CountyInmate.objects.all().aggregate(Max('booking_date'))['booking_date__max']
+        max_date = datetime.combine(max_booking_date, datetime.min.time()) + timedelta(days=1)
+
+        inmates_by_id, custody, bookings = self.read_inmates()
 
         for day in self.daterange(min_date, max_date):
             print("Processing %s-%s-%s" % (day.year, day.month, day.day))
-            inmates = CountyInmate.objects.filter(booking_date__lte=day)\
-                .filter(Q(discharge_date_earliest__gt=day) | Q(discharge_date_earliest__isnull=True))
+            inmates = [inmates_by_id[jail_id] for jail_id in custody.keys_at(day)]
                 
-            inmates_booked = CountyInmate.objects.filter(booking_date=day)
+            inmates_booked = bookings[day.date()]
             
             daily_pop_row = self.count_dictionary(inmates, template)
             booking_row = self.count_dictionary(inmates_booked, booking_template, track_minors=True)
@@ -89,6 +96,24 @@ class Command(BaseCommand):
 
         self.save_count(counts, DailyPopulationCounts)
         self.save_count(booking_counts, DailyBookingsCounts)
+        bump_data_generation()
+
+    def read_inmates(self):
+        """
+        Reads the inmates in one pass and indexes their custody intervals, so each day's population is found with
+        a lookup in the index rather than a query, see countyapi/intervals.py.
+        """
+        inmates_by_id = {}
+        intervals = []
+        bookings = defaultdict(list)
+        for values in CountyInmate.objects.order_by().values_list(*InmateSummary._fields).iterator():
+            inmate = InmateSummary(*values)
+            inmates_by_id[inmate.jail_id] = inmate
+            interval = custody_interval(inmate.booking_date, inmate.discharge_date_earliest)
+            if interval is not None:
+                intervals.append((inmate.jail_id,) + interval)
+            bookings[inmate.booking_date].append(inmate)
+        return inmates_by_id, IntervalIndex(intervals), bookings
 
     def count_dictionary(self, inmates, counts_template, track_minors=False):
         row = copy(counts_template)
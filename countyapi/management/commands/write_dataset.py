@@ -0,0 +1,31 @@
+from datetime import datetime
+import os
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from countyapi.cache import bump_data_generation
+from countyapi.dataset import DATASET_DIR, dataset_format, write_dataset
+
+
+class Command(BaseCommand):
+
+    help = "Write the typed bulk download of the whole dataset, as Parquet when pyarrow is installed and as an " \
+           "SQLite database otherwise."
+
+    option_list = BaseCommand.option_list + (
+        make_option('--dir', action='store', dest='dataset_dir', default=None,
+                    help='Directory to write the dataset to, defaults to the dataset directory in '
+                         'settings.EXPORTS_DIR.'),
+    )
+
+    def handle(self, *args, **options):
+        dataset_dir = options['dataset_dir'] or os.path.join(settings.EXPORTS_DIR, DATASET_DIR)
+        start_time = datetime.now()
+        number_rows = write_dataset(dataset_dir)
+        # The API's list of the dataset files is cached until the data generation changes
+        bump_data_generation()
+        self.stdout.write("Wrote the dataset as %s in %s: %s." %
+                          (dataset_format(), str(datetime.now() - start_time),
+                           ', '.join('%d %s rows' % (number_rows[table], table) for table in sorted(number_rows))))
@@ -0,0 +1,36 @@
+from datetime import datetime
+import os
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from countyapi.cache import bump_data_generation
+from countyapi.exports import write_list_exports
+from countyapi.urls import v1_api
+
+
+class Command(BaseCommand):
+
+    help = "Write the full API list exports that the API sends in place of the matching list requests."
+
+    option_list = BaseCommand.option_list + (
+        make_option('--dir', action='store', dest='exports_dir', default=None,
+                    help='Directory to write the exports to, defaults to settings.EXPORTS_DIR.'),
+    )
+
+    def handle(self, *args, **options):
+        exports_dir = options['exports_dir'] or settings.EXPORTS_DIR
+        if not os.path.isdir(exports_dir):
+            os.makedirs(exports_dir)
+        for resource_name in sorted(v1_api._registry):
+            resource = v1_api.canonical_resource_for(resource_name)
+            if not resource.list_exports:
+                continue
+            start_time = datetime.now()
+            number_objects = write_list_exports(resource, exports_dir)
+            self.stdout.write("Exported %d %s objects as %s in %s." %
+                              (number_objects, resource_name, ', '.join(sorted(resource.list_exports)),
+                               str(datetime.now() - start_time)))
+        # The exported lists' validators only change with the data generation
+        bump_data_generation()
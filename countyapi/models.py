@@ -1,5 +1,7 @@
 from django.db import models
 
+from countyapi import sqlite_pragmas
+
 
 class CountyInmate(models.Model):
     """
@@ -154,3 +156,21 @@ class DailyBookingsCounts(models.Model):
 
     class Meta:
         ordering = ['booking_date']
+
+
+class DailyHousingOccupancy(models.Model):
+    """
+    Number of inmates in each housing division and sub division by day, see countyapi/occupancy.py.
+    """
+    date = models.DateField(db_index=True)
+    division = models.CharField(max_length=4)
+    sub_division = models.CharField(max_length=20)
+    population = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['date', 'division', 'sub_division']
+        index_together = [['division', 'date']]
+
+
+# Django runs models.py once at start up, before any connection is made
+sqlite_pragmas.register()
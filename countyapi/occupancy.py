@@ -0,0 +1,50 @@
+"""
+DailyHousingOccupancy, the number of inmates in each housing division and sub division by day. It is worked out
+from the custody interval and housing history indexes, see countyapi/population.py, and written by the scraper
+for the last few days after each run, and for any period by the generate_housing_occupancy command.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+
+from countyapi.intervals import CustodyIndex
+from countyapi.models import DailyHousingOccupancy
+from countyapi.population import HousingTimeline
+
+# Days, up to today, the scraper rewrites after each run. Inmates are only found discharged once they have been
+# missing for a while, which changes the days since they were last seen.
+SCRAPER_OCCUPANCY_DAYS = 7
+
+
+def daily_occupancy(custody, housing, day):
+    """
+    The number of inmates in custody on the day in each (division, sub_division), inmates never seen in a
+    housing location are left out.
+    """
+    occupancy = defaultdict(int)
+    for jail_id in custody.keys_at(day):
+        location = housing.location_on(jail_id, day)
+        if location is not None:
+            occupancy[housing.location_divisions[location]] += 1
+    return occupancy
+
+
+def write_housing_occupancy(first_day, last_day):
+    """
+    Replaces the DailyHousingOccupancy rows of the days from first_day to last_day.
+    @return the number of rows written
+    """
+    custody, housing = CustodyIndex(), HousingTimeline()
+    rows = []
+    day = first_day
+    while day <= last_day:
+        for (division, sub_division), population in sorted(daily_occupancy(custody, housing, day).items()):
+            rows.append(DailyHousingOccupancy(date=day, division=division, sub_division=sub_division,
+                                              population=population))
+        day += timedelta(days=1)
+    with transaction.commit_on_success():
+        DailyHousingOccupancy.objects.filter(date__gte=first_day, date__lte=last_day).delete()
+        DailyHousingOccupancy.objects.bulk_create(rows)
+    return len(rows)
@@ -0,0 +1,187 @@
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.utils.encoding import force_bytes
+from tastypie.exceptions import BadRequest
+from tastypie.paginator import Paginator
+
+CURSOR = 'cursor'
+
+COUNT = 'count'
+
+ESTIMATE = 'estimate'
+
+EXACT_VALUES = {'', '1', 'true'}
+
+# Fields whose cursor positions are JSON numbers, the positions of the others are JSON strings
+INTEGER_FIELD_TYPES = {'AutoField', 'BigIntegerField', 'IntegerField', 'PositiveIntegerField',
+                       'PositiveSmallIntegerField', 'SmallIntegerField'}
+
+
+def encode_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps([position], cls=DjangoJSONEncoder))
+
+
+def decode_cursor(cursor, field):
+    """
+    The position in a cursor encode_cursor made for the field. Cursors come from clients, so anything that is not
+    a list holding one position of the field's type is a BadRequest.
+    """
+    try:
+        position = json.loads(base64.urlsafe_b64decode(str(cursor)))
+    except (TypeError, ValueError, UnicodeEncodeError):
+        position = None
+    if not isinstance(position, list) or len(position) != 1 or not is_position_of(position[0], field):
+        raise BadRequest("Invalid cursor '%s' provided." % cursor)
+    return position[0]
+
+
+def is_position_of(position, field):
+    if field.get_internal_type() in INTEGER_FIELD_TYPES:
+        return isinstance(position, (int, long)) and not isinstance(position, bool)
+    return isinstance(position, basestring)
+
+
+def planner_estimate(objects):
+    """
+    The number of rows Postgres' planner expects the objects' query to return, taken from its statistics
+    without running the query.
+    """
+    sql, params = objects.order_by().query.sql_with_params()
+    cursor = connections[objects.db].cursor()
+    cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, basestring):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class JailPaginator(Paginator):
+    """
+    tastypie's Paginator with a say over the total count, which on a filtered list can cost more than the page:
+        count=false leaves it out, meta's next link is then given whenever the page is full
+        count=estimate gives Postgres' planner estimate, other databases give the exact count
+    Exact counts are kept in the cache for each filtered query, until the data changes.
+    """
+
+    def __init__(self, request_data, objects, cache=None, **kwargs):
+        super(JailPaginator, self).__init__(request_data, objects, **kwargs)
+        self.cache = cache
+
+    def get_count_option(self):
+        count_option = self.request_data.get(COUNT, '').lower()
+        if count_option in settings.NEGATIVE_VALUES or count_option == ESTIMATE or count_option in EXACT_VALUES:
+            return count_option
+        raise BadRequest("Invalid count '%s' provided. Please provide true, false or estimate." % count_option)
+
+    def get_total_count(self):
+        """
+        The total count the count option asks for, None when it is to be left out.
+        """
+        count_option = self.get_count_option()
+        if count_option in settings.NEGATIVE_VALUES:
+            return None
+        if count_option == ESTIMATE and connections[self.objects.db].vendor == 'postgresql':
+            return planner_estimate(self.objects)
+        return self.get_count()
+
+    def get_count(self):
+        if self.cache is None:
+            return super(JailPaginator, self).get_count()
+        sql, params = self.objects.order_by().query.sql_with_params()
+        cache_key = 'count:%s' % hashlib.md5(force_bytes(repr((sql, params)))).hexdigest()
+        count = self.cache.get(cache_key)
+        if count is None:
+            count = super(JailPaginator, self).get_count()
+            self.cache.set(cache_key, count)
+        return count
+
+    def page(self):
+        """
+        Same as tastypie's page unless the count is left out.
+        """
+        limit = self.get_limit()
+        offset = self.get_offset()
+        count = self.get_total_count()
+        objects = self.get_slice(limit, offset)
+        meta = {
+            'offset': offset,
+            'limit': limit,
+        }
+        if count is not None:
+            meta['total_count'] = count
+        if limit:
+            meta['previous'] = self.get_previous(limit, offset)
+            if count is None:
+                meta['next'] = self._generate_uri(limit, offset + limit) if len(objects) == limit else None
+            else:
+                meta['next'] = self.get_next(limit, offset, count)
+        return {
+            self.collection_name: objects,
+            'meta': meta,
+        }
+
+
+class CursorPaginator(JailPaginator):
+    """
+    Keyset pagination: a page starts right after the last object of the page before it, which is found by
+    filtering on the ordering field rather than with an OFFSET, so every page costs the same no matter how far
+    into the list it is. The position is passed as an opaque cursor and meta's next link carries the cursor for
+    the next page. With count=false walking the whole list takes no COUNT(*) at all.
+    """
+
+    def __init__(self, request_data, objects, ordering, **kwargs):
+        super(CursorPaginator, self).__init__(request_data, objects, **kwargs)
+        self.ordering = ordering
+        self.field = ordering.lstrip('-')
+        self.descending = ordering.startswith('-')
+
+    def get_offset(self):
+        return 0
+
+    def get_cursor(self):
+        cursor = self.request_data.get(CURSOR)
+        return decode_cursor(cursor, self.objects.model._meta.get_field(self.field)) if cursor else None
+
+    def get_slice(self, limit, offset):
+        objects = self.objects.order_by(self.ordering)
+        position = self.get_cursor()
+        if position is not None:
+            objects = objects.filter(**{'%s__%s' % (self.field, 'lt' if self.descending else 'gt'): position})
+        if limit:
+            return objects[:limit]
+        return objects
+
+    def get_next_cursor(self, limit, cursor):
+        request_params = self.request_data.copy()
+        for param in ['limit', 'offset', CURSOR]:
+            if param in request_params:
+                del request_params[param]
+        request_params.update({'limit': limit, CURSOR: cursor})
+        return '%s?%s' % (self.resource_uri, request_params.urlencode())
+
+    def page(self):
+        """
+        One more object than the limit is read to find out if there is a next page.
+        """
+        limit = self.get_limit()
+        meta = {
+            'limit': limit,
+            CURSOR: self.request_data.get(CURSOR) or None,
+            'previous': None,
+            'next': None,
+        }
+        count = self.get_total_count()
+        if count is not None:
+            meta['total_count'] = count
+        if not limit:
+            return {self.collection_name: self.get_slice(limit, 0), 'meta': meta}
+        objects = list(self.get_slice(limit + 1, 0))
+        if len(objects) > limit:
+            objects = objects[:limit]
+            meta['next'] = self.get_next_cursor(limit, encode_cursor(getattr(objects[-1], self.field)))
+        return {self.collection_name: objects, 'meta': meta}
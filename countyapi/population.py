@@ -0,0 +1,121 @@
+"""
+Who was in custody on a given day and in which housing division, served by PopulationResource in
+countyapi/api.py. The answers come from in-process indexes of the inmates' custody intervals and housing
+history, which each process builds once and refreshes when the data generation changes.
+"""
+
+from array import array
+from bisect import bisect_right
+
+from countyapi.cache import data_generation
+from countyapi.intervals import CustodyIndex, day_number
+from countyapi.models import HousingHistory, HousingLocation
+
+HOUSING_LOCATION = 'housing_location'
+
+UNKNOWN_DIVISION = 'unknown'
+
+DIVISION_KEY_FORMAT = 'division_%s'
+
+JAIL_IDS = 'jail_ids'
+
+_population = None
+
+
+class HousingTimeline(object):
+    """
+    The housing locations each inmate was seen in, and from which day. Housing history is only ever added to,
+    so it is refreshed by reading the entries with a higher id than the ones already read.
+    """
+
+    def __init__(self):
+        self._days = {}
+        self._locations = {}
+        self._last_id = 0
+        self.divisions = [UNKNOWN_DIVISION]
+        self._add(HousingHistory.objects.order_by('inmate', 'housing_date_discovered', 'id'))
+
+    def refresh(self):
+        self._add(HousingHistory.objects.filter(id__gt=self._last_id).order_by('id'))
+
+    def _add(self, housing_history):
+        # housing_location: (division, sub_division)
+        self.location_divisions = dict((location, (division, sub_division)) for location, division, sub_division
+                                       in HousingLocation.objects.values_list(HOUSING_LOCATION, 'division',
+                                                                              'sub_division'))
+        divisions = set(self.divisions[:-1])
+        for history_id, jail_id, discovered, location in housing_history.filter(housing_date_discovered__isnull=False)\
+                .values_list('id', 'inmate', 'housing_date_discovered', HOUSING_LOCATION).iterator():
+            if jail_id not in self._days:
+                self._days[jail_id] = array('l')
+                self._locations[jail_id] = []
+            days = self._days[jail_id]
+            position = bisect_right(days, day_number(discovered))
+            days.insert(position, day_number(discovered))
+            self._locations[jail_id].insert(position, location)
+            divisions.add(self.location_divisions[location][0])
+            self._last_id = max(self._last_id, history_id)
+        self.divisions = sorted(divisions) + [UNKNOWN_DIVISION]
+
+    def location_on(self, jail_id, day):
+        """
+        The housing location the inmate was last seen in by the day, None when it was never seen in one.
+        The scraper only finds an inmate's housing after the booking, so before that it is the first location
+        the inmate was seen in.
+        """
+        days = self._days.get(jail_id)
+        if days is None:
+            return None
+        return self._locations[jail_id][max(bisect_right(days, day_number(day)) - 1, 0)]
+
+    def division_on(self, jail_id, day):
+        location = self.location_on(jail_id, day)
+        return UNKNOWN_DIVISION if location is None else self.location_divisions[location][0]
+
+
+class Population(object):
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.custody = CustodyIndex()
+        self.housing = HousingTimeline()
+
+    def refresh(self, generation):
+        self.custody.refresh()
+        self.housing.refresh()
+        self.generation = generation
+
+    def on(self, day, with_ids=False):
+        """
+        The number of inmates in custody on the day, in total and in each housing division.
+        """
+        jail_ids = self.custody.keys_at(day)
+        counts = dict.fromkeys([DIVISION_KEY_FORMAT % division for division in self.housing.divisions], 0)
+        for jail_id in jail_ids:
+            counts[DIVISION_KEY_FORMAT % self.housing.division_on(jail_id, day)] += 1
+        counts['date'] = day
+        counts['total'] = len(jail_ids)
+        if with_ids:
+            counts[JAIL_IDS] = sorted(jail_ids)
+        return counts
+
+    def columns(self, with_ids=False):
+        """
+        The keys of the rows on gives, in the order they are written to CSV.
+        """
+        columns = ['date', 'total'] + [DIVISION_KEY_FORMAT % division for division in self.housing.divisions]
+        return columns + [JAIL_IDS] if with_ids else columns
+
+
+def current_population():
+    """
+    The Population of the current data generation, built the first time it is asked for and refreshed when
+    the data generation has changed since.
+    """
+    global _population
+    generation = data_generation()
+    if _population is None:
+        _population = Population(generation)
+    elif _population.generation != generation:
+        _population.refresh(generation)
+    return _population
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 SITE_STATIC_ROOT = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
 SITE_DIR = os.path.dirname(os.path.dirname(__file__))
@@ -31,6 +32,14 @@ def use_postgres():
     return in_production() or env_var_active('USE_POSTGRES')
 
 
+def in_scraper():
+    """
+    Calculates if the settings are being used by the scraper process.
+    If environment var CCJ_SCRAPER != False or 0 or None, then in scraper mode
+    """
+    return env_var_active('CCJ_SCRAPER')
+
+
 if not in_production():
     DEBUG = True
     TEMPLATE_DEBUG = DEBUG
@@ -52,6 +61,11 @@ if use_postgres():
             'HOST': '127.0.0.1',
         }
     }
+    if in_scraper():
+        # The scraper keeps one connection open for the whole run and writes one inmate at a time, so let
+        # Postgres commit each statement itself instead of holding a transaction open between writes.
+        # This also stops a failed write from leaving the connection in an aborted transaction.
+        DATABASES['default']['OPTIONS'] = {'autocommit': True}
 else:
     DATABASES = {
         'default': {
@@ -59,6 +73,19 @@ else:
             'NAME': os.path.join(SITE_DIR, 'ccj')
         }
     }
+    # Applied to every new SQLite connection by countyapi.sqlite_pragmas. WAL lets the API read while the
+    # scraper writes and with it synchronous=NORMAL only fsyncs at checkpoints, not on every commit.
+    SQLITE_PRAGMAS = [
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('cache_size', -64000),  # in KiB, so 64MB
+        ('mmap_size', 268435456),  # 256MB
+        ('temp_store', 'MEMORY'),
+    ]
+    if in_scraper():
+        # sqlite3 reuses prepared statements from a per connection cache, the scraper issues the same
+        # handful of statements for every inmate so a bigger cache keeps them all prepared.
+        DATABASES['default']['OPTIONS'] = {'cached_statements': 500}
 
 # Time zone
 TIME_ZONE = 'America/Chicago'
@@ -142,6 +169,40 @@ INSTALLED_APPS = (
 
 ALLOWED_POST_IPS = ['127.0.0.1']
 
+# The API cache is shared by the gunicorn workers and the scraper, which bumps its data generation whenever it
+# changes the data, see countyapi/cache.py. Entries last until then, or at most TIMEOUT seconds. The generation
+# is kept in a file of its own, outside of the cache, so the cache's culling can not lose it.
+if in_production():
+    API_CACHE_DIR = '/home/ubuntu/website/1.0/api_cache'
+    DATA_GENERATION_FILE = '/home/ubuntu/website/1.0/api_data_generation'
+else:
+    API_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'cookcountyjail_api_cache')
+    DATA_GENERATION_FILE = os.path.join(tempfile.gettempdir(), 'cookcountyjail_api_data_generation')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': API_CACHE_DIR,
+        'TIMEOUT': 7 * 24 * 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+# Full API list exports written by the write_exports command, the API sends them in place of the matching
+# list requests. When EXPORTS_URL is set the web server sends them, see config/nginx-v1.conf.
+if in_production():
+    EXPORTS_DIR = '/home/ubuntu/website/1.0/exports'
+    EXPORTS_URL = '/exports/'
+else:
+    EXPORTS_DIR = os.path.join(SITE_DIR, 'exports')
+    EXPORTS_URL = None
+EXPORTS_DIR = os.environ.get('CCJ_EXPORTS_DIR', EXPORTS_DIR)
+
 ALLOWED_HOSTS = ['cookcountyjail.recoveredfactory.net']
 
 LOGGING = {
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+
+def set_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Configures each new SQLite connection with the pragmas listed in settings.SQLITE_PRAGMAS.
+    Other databases are left alone.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for pragma, value in getattr(settings, 'SQLITE_PRAGMAS', []):
+        connection.connection.execute('PRAGMA %s = %s' % (pragma, value))
+
+
+def register():
+    """
+    Has set_sqlite_pragmas configure every database connection made from now on.
+    """
+    connection_created.connect(set_sqlite_pragmas, dispatch_uid='countyapi.sqlite_pragmas')
@@ -0,0 +1,143 @@
+"""
+Population statistics worked out in the database with GROUP BY queries, served by StatsResource in countyapi/api.py.
+"""
+
+from itertools import groupby
+import math
+
+from django.db import connection
+from django.db.models import Count
+from tastypie.exceptions import BadRequest
+
+from countyapi.models import CountyInmate, HousingHistory, HousingLocation
+
+DIVISION = 'division'
+
+AGE_BAND = 'age_band'
+
+BAIL_AMOUNT = 'bail_amount'
+
+COUNT = 'count'
+
+BAIL_COUNT = 'bail_count'
+
+# Dimensions the statistics can be grouped by and the column each one groups on
+DIMENSIONS = {
+    'date': 'booking_date',
+    DIVISION: DIVISION,
+    'gender': 'gender',
+    'race': 'race',
+    'in_jail': 'in_jail',
+}
+
+# Age bands at booking as (name, youngest age) pairs, each band runs up to the youngest age of the next one
+AGE_BANDS = (('under_18', None), ('18_24', 18), ('25_34', 25), ('35_44', 35), ('45_54', 45), ('55_64', 55),
+             ('65_and_over', 65))
+
+UNKNOWN_AGE = 'unknown'
+
+BAIL_PERCENTILES = (25, 50, 75, 90)
+
+
+def parse_dimensions(dimensions_param):
+    """
+    The dimensions of a comma separated dimensions parameter, in the order given.
+    """
+    dimensions = []
+    for dimension in (dimensions_param or '').split(','):
+        dimension = dimension.strip()
+        if dimension and dimension not in dimensions:
+            if dimension not in DIMENSIONS:
+                raise BadRequest("Invalid dimension '%s' provided. Please provide dimensions from: %s." %
+                                 (dimension, ', '.join(sorted(DIMENSIONS))))
+            dimensions.append(dimension)
+    return dimensions
+
+
+def stats_columns(dimensions):
+    """
+    The keys of the statistics rows, in the order they are written to CSV.
+    """
+    return dimensions + [COUNT] + ['age_%s' % band for band, _ in AGE_BANDS] + ['age_%s' % UNKNOWN_AGE] + \
+        [BAIL_COUNT] + ['bail_p%d' % percentile for percentile in BAIL_PERCENTILES]
+
+
+def population_stats(inmates, dimensions):
+    """
+    One row for each combination of the dimensions' values among the inmates, with how many inmates there are,
+    how many are in each age band and the percentiles of their bail amounts. The age bands are counted by
+    grouping on the band as well, and the percentiles are read off the number of inmates with each bail amount,
+    so the database sends back a row per group and age band or bail amount rather than a row per inmate.
+    """
+    columns = [DIMENSIONS[dimension] for dimension in dimensions]
+    selects = {AGE_BAND: age_band_sql()}
+    if DIVISION in dimensions:
+        selects[DIVISION] = division_sql()
+    grouped = inmates.extra(select=selects)
+
+    rows = {}
+    ordered_rows = []
+    for group in grouped.values(*(columns + [AGE_BAND])).annotate(**{COUNT: Count('pk')}).order_by(*columns):
+        key = tuple(group[column] for column in columns)
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = dict.fromkeys(stats_columns(dimensions), 0)
+            row.update(zip(dimensions, key))
+            for percentile in BAIL_PERCENTILES:
+                row['bail_p%d' % percentile] = None
+            ordered_rows.append(row)
+        row[COUNT] += group[COUNT]
+        row['age_%s' % group[AGE_BAND]] += group[COUNT]
+
+    bail_amounts = grouped.filter(bail_amount__isnull=False).values(*(columns + [BAIL_AMOUNT]))\
+        .annotate(**{COUNT: Count('pk')}).order_by(*(columns + [BAIL_AMOUNT]))
+    for key, amounts in groupby(bail_amounts, lambda group: tuple(group[column] for column in columns)):
+        amounts = [(group[BAIL_AMOUNT], group[COUNT]) for group in amounts]
+        row = rows[key]
+        row[BAIL_COUNT] = sum(count for _, count in amounts)
+        for percentile, amount in percentiles(amounts, row[BAIL_COUNT]):
+            row['bail_p%d' % percentile] = amount
+    return ordered_rows
+
+
+def percentiles(amounts, total):
+    """
+    Nearest rank BAIL_PERCENTILES of the amounts, given as (amount, number of inmates) pairs in ascending order.
+    """
+    ranks = [(percentile, int(math.ceil(percentile * total / 100.0))) for percentile in BAIL_PERCENTILES]
+    seen = 0
+    for amount, count in amounts:
+        seen += count
+        while ranks and ranks[0][1] <= seen:
+            yield ranks.pop(0)[0], amount
+
+
+def age_band_sql():
+    column = '%s.%s' % (quoted_table(CountyInmate), connection.ops.quote_name('age_at_booking'))
+    cases = ['WHEN %s IS NULL THEN \'%s\'' % (column, UNKNOWN_AGE)]
+    for (band, _), (_, next_youngest) in zip(AGE_BANDS, AGE_BANDS[1:]):
+        cases.append('WHEN %s < %d THEN \'%s\'' % (column, next_youngest, band))
+    return 'CASE %s ELSE \'%s\' END' % (' '.join(cases), AGE_BANDS[-1][0])
+
+
+def division_sql():
+    """
+    The division of the inmate's most recent housing location. The subquery is in parentheses since the
+    GROUP BY clause repeats it as it is.
+    """
+    quote_name = connection.ops.quote_name
+    history, location = quoted_table(HousingHistory), quoted_table(HousingLocation)
+    discovered = '%s.%s' % (history, quote_name(HousingHistory._meta.get_field('housing_date_discovered').column))
+    return '(SELECT %s.%s FROM %s INNER JOIN %s ON %s.%s = %s.%s WHERE %s.%s = %s.%s ' \
+           'ORDER BY %s IS NULL, %s DESC, %s.%s DESC LIMIT 1)' % (
+               location, quote_name(HousingLocation._meta.get_field(DIVISION).column),
+               history, location,
+               history, quote_name(HousingHistory._meta.get_field('housing_location').column),
+               location, quote_name(HousingLocation._meta.pk.column),
+               history, quote_name(HousingHistory._meta.get_field('inmate').column),
+               quoted_table(CountyInmate), quote_name(CountyInmate._meta.pk.column),
+               discovered, discovered, history, quote_name(HousingHistory._meta.pk.column))
+
+
+def quoted_table(model):
+    return connection.ops.quote_name(model._meta.db_table)
@@ -0,0 +1,63 @@
+"""
+Column oriented copies of the daily summaries, served by TimeSeriesResource in countyapi/api.py. Each process
+reads a summary table into integer arrays once per data generation and answers every request from them.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from countyapi.cache import data_generation
+from countyapi.models import DailyPopulationCounts, DailyBookingsCounts
+
+BOOKING_DATE = 'booking_date'
+
+DATES = 'dates'
+
+# Summary tables by series name
+SERIES = {
+    'population': DailyPopulationCounts,
+    'bookings': DailyBookingsCounts,
+}
+
+_time_series = {}
+
+
+class TimeSeries(object):
+    """
+    A summary table as an array of day numbers and an array of counts for each of its columns.
+    """
+
+    def __init__(self, model, generation):
+        self.generation = generation
+        self.columns = [field.name for field in model._meta.fields
+                        if field.name != BOOKING_DATE and not field.primary_key]
+        self._days = array('l')
+        self._values = [array('l') for _ in self.columns]
+        for row in model.objects.filter(booking_date__isnull=False).order_by(BOOKING_DATE)\
+                .values_list(BOOKING_DATE, *self.columns).iterator():
+            self._days.append(row[0].toordinal())
+            for values, value in zip(self._values, row[1:]):
+                values.append(value)
+
+    def between(self, first_day=None, last_day=None):
+        """
+        The dates from first_day to last_day, both included, and the columns' counts on them, as lists.
+        """
+        start = 0 if first_day is None else bisect_left(self._days, first_day.toordinal())
+        end = len(self._days) if last_day is None else bisect_right(self._days, last_day.toordinal())
+        data = {DATES: [date.fromordinal(day).isoformat() for day in self._days[start:end]]}
+        for column, values in zip(self.columns, self._values):
+            data[column] = values[start:end].tolist()
+        return data
+
+
+def time_series(name):
+    """
+    The TimeSeries of the current data generation for the series, read the first time it is asked for.
+    """
+    generation = data_generation()
+    series = _time_series.get(name)
+    if series is None or series.generation != generation:
+        series = _time_series[name] = TimeSeries(SERIES[name], generation)
+    return series
@@ -2,7 +2,8 @@ from django.conf.urls import patterns, include, url
 from tastypie.api import Api
 from countyapi.api import CountyInmateResource, CourtLocationResource, \
     CourtDateResource, HousingLocationResource, HousingHistoryResource, \
-    DailyPopulationCountsResource, DailyBookingsCountsResource, ChargesHistoryResource
+    DailyPopulationCountsResource, DailyBookingsCountsResource, ChargesHistoryResource, StatsResource, \
+    PopulationResource, DailyHousingOccupancyResource, TimeSeriesResource, DatasetResource
 
 v1_api = Api(api_name='1.0')
 v1_api.register(CountyInmateResource())
@@ -12,6 +13,11 @@ v1_api.register(HousingLocationResource())
 v1_api.register(HousingHistoryResource())
 v1_api.register(DailyPopulationCountsResource())
 v1_api.register(DailyBookingsCountsResource())
+v1_api.register(DailyHousingOccupancyResource())
 v1_api.register(ChargesHistoryResource())
+v1_api.register(StatsResource())
+v1_api.register(PopulationResource())
+v1_api.register(TimeSeriesResource())
+v1_api.register(DatasetResource())
 
 urlpatterns = patterns('', url(r'^api/', include(v1_api.urls)))
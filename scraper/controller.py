@@ -4,6 +4,7 @@ import gevent
 from gevent.queue import Queue
 
 from heartbeat import Heartbeat
+from inmate_ids import InmateIds
 
 from search_commands import SearchCommands
 from utils import ONE_DAY
@@ -32,9 +33,9 @@ class Controller:
         self._worker = []
         self.inmates_response_q = Queue(None)
         self._inmates_worker = []
-        self._inmates_response = []
+        self._inmates_response = InmateIds()
         self._start_date_missing_inmates = None
-        self._active_inmate_ids = []
+        self._active_inmate_ids = InmateIds()
         self._today = date.today()
 
     def _active_inmates(self):
@@ -44,13 +45,6 @@ class Controller:
     def _debug(self, msg):
         self._monitor.debug('Controller: %s' % msg)
 
-    def _end_index_active_inmate_ids_in_search_window(self):
-        end_date = (self._today - ONE_DAY * (NEW_INMATE_SEARCH_WINDOW_SIZE + 2)).strftime('%Y-%m%d')
-        for i in range(len(self._active_inmate_ids)):
-            if end_date >= self._active_inmate_ids[i][0:9]:
-                return i
-        return len(self._active_inmate_ids)
-
     def find_missing_inmates(self, start_date):
         if not self.is_running:
             self._start_date_missing_inmates = start_date
@@ -100,14 +94,18 @@ class Controller:
         self._debug('find_missing_inmates stopped')
 
     def _find_new_inmates(self):
-        end_index = self._end_index_active_inmate_ids_in_search_window()
-        self._search_commands.find_inmates(exclude_list=self._active_inmate_ids[0:end_index],
-                                           start_date=self._today - ONE_DAY * (NEW_INMATE_SEARCH_WINDOW_SIZE + 1))
+        start_date = self._new_inmate_search_window_start_date()
+        self._search_commands.find_inmates(exclude_list=self._active_inmate_ids.booked_between(start_date,
+                                                                                               self._today),
+                                           start_date=start_date)
 
     def _known_inmates(self):
         self._inmates.known_inmates_ids_starting_with(self.inmates_response_q, self._start_date_missing_inmates)
         self._retrieve_inmates_response(self._RECEIVED_KNOWN_INMATES_COMMAND)
 
+    def _new_inmate_search_window_start_date(self):
+        return self._today - ONE_DAY * (NEW_INMATE_SEARCH_WINDOW_SIZE + 1)
+
     def _notify(self, notification_msg):
         self._monitor.notify(self.__class__, notification_msg)
 
@@ -0,0 +1,46 @@
+from django.conf import settings
+from gevent.socket import wait_read, wait_write
+
+try:
+    import psycopg2
+    from psycopg2 import extensions
+except ImportError:
+    psycopg2 = None
+
+POSTGRES_ENGINE = 'django.db.backends.postgresql_psycopg2'
+
+
+def gevent_wait_callback(conn, timeout=None):
+    """
+    Waits for a psycopg2 connection by parking the current greenlet on the connection's socket, so the gevent
+    hub keeps running the other greenlets, e.g. the http requests, while Postgres does its work.
+    """
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise psycopg2.OperationalError('Bad result from poll: %r' % state)
+
+
+def make_db_cooperative(monitor, databases=None):
+    """
+    Installs the gevent wait callback in psycopg2 when the database is Postgres. Other databases, i.e. SQLite,
+    have no way to wait cooperatively, so they are left as is.
+    @return True if the wait callback was installed
+    """
+    if databases is None:
+        databases = settings.DATABASES
+    if databases['default']['ENGINE'] != POSTGRES_ENGINE:
+        monitor.debug('green_db: database is not Postgres, database calls will block the scraper')
+        return False
+    if psycopg2 is None or not hasattr(extensions, 'set_wait_callback'):
+        monitor.debug('green_db: psycopg2 does not support wait callbacks, database calls will block the scraper')
+        return False
+    extensions.set_wait_callback(gevent_wait_callback)
+    monitor.debug('green_db: installed gevent wait callback for Postgres')
+    return True
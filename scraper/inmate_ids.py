@@ -0,0 +1,96 @@
+from utils import ONE_DAY
+
+_BOOKING_DAY_FORMAT = '%Y-%m%d'
+_BOOKING_DAY_LENGTH = len('YYYY-MMDD')
+_JAIL_ID_LENGTH = len('YYYY-MMDDNNN')
+
+
+class InmateIds(object):
+    """
+    Compact collection of jail ids.
+
+    A jail id is the booking date followed by a three digit booking number, YYYY-MMDDNNN, so instead of
+    holding thousands of id strings the ids are stored as one integer bitmap of booking numbers per
+    booking day. Membership tests are O(1) and the collection can be handed straight to the search
+    commands without being converted to a set. Ids that do not follow the standard format are kept as is.
+    """
+
+    def __init__(self, jail_ids=None):
+        self._days = {}
+        self._irregular_ids = set()
+        self._count = 0
+        if jail_ids is not None:
+            for jail_id in jail_ids:
+                self.add(jail_id)
+
+    def add(self, jail_id):
+        booking_day, booking_number = _split(jail_id)
+        if booking_day is None:
+            if jail_id not in self._irregular_ids:
+                self._irregular_ids.add(jail_id)
+                self._count += 1
+            return
+        bitmap = self._days.get(booking_day, 0)
+        bit = 1 << booking_number
+        if not bitmap & bit:
+            self._days[booking_day] = bitmap | bit
+            self._count += 1
+
+    def booked_between(self, start_date, end_date):
+        """
+        Returns the ids booked from start_date through end_date inclusive. Each day in the range is a direct
+        lookup, the bitmaps are shared with this collection rather than copied id by id.
+        """
+        inmate_ids = InmateIds()
+        cur_date = start_date
+        while cur_date <= end_date:
+            booking_day = cur_date.strftime(_BOOKING_DAY_FORMAT)
+            bitmap = self._days.get(booking_day)
+            if bitmap:
+                inmate_ids._days[booking_day] = bitmap
+                inmate_ids._count += bin(bitmap).count('1')
+            cur_date += ONE_DAY
+        return inmate_ids
+
+    def booking_days(self):
+        """
+        Returns the booking days, formatted as YYYY-MMDD, that have at least one id, most recent first.
+        """
+        return sorted(self._days.keys(), reverse=True)
+
+    def __contains__(self, jail_id):
+        booking_day, booking_number = _split(jail_id)
+        if booking_day is None:
+            return jail_id in self._irregular_ids
+        return bool((self._days.get(booking_day, 0) >> booking_number) & 1)
+
+    def __iter__(self):
+        """
+        Iterates over the ids in descending order, the same order as CountyInmate.Meta.ordering,
+        followed by any irregular ids.
+        """
+        for booking_day in self.booking_days():
+            bitmap = self._days[booking_day]
+            booking_number = bitmap.bit_length() - 1
+            while booking_number >= 0:
+                if (bitmap >> booking_number) & 1:
+                    yield '%s%03d' % (booking_day, booking_number)
+                booking_number -= 1
+        for jail_id in sorted(self._irregular_ids, reverse=True):
+            yield jail_id
+
+    def __len__(self):
+        return self._count
+
+
+def _split(jail_id):
+    """
+    Splits a jail id into its booking day and booking number, returns (None, None) if the id is not in the
+    standard YYYY-MMDDNNN format.
+    """
+    if not isinstance(jail_id, basestring) or len(jail_id) != _JAIL_ID_LENGTH:
+        return None, None
+    booking_number = jail_id[_BOOKING_DAY_LENGTH:]
+    if not booking_number.isdigit():
+        return None, None
+    return jail_id[0:_BOOKING_DAY_LENGTH], int(booking_number)
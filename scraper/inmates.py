@@ -1,6 +1,10 @@
 
+from collections import defaultdict
+from time import time
+
 from utils import ONE_DAY, yesterday
 from concurrent_base import ConcurrentBase
+from inmate_ids import InmateIds
 
 
 class Inmates(ConcurrentBase):
@@ -9,6 +13,8 @@ class Inmates(ConcurrentBase):
         super(Inmates, self).__init__(monitor)
         self._inmate_class = inmate_class
         self.__raw_inmate_data = raw_inmate_data
+        self._db_times = defaultdict(float)
+        self._db_commands_counts = defaultdict(int)
 
     def active_inmates_ids(self, response_queue):
         self._put(self._active_inmates_ids, response_queue)
@@ -30,15 +36,42 @@ class Inmates(ConcurrentBase):
     def _discharge(self, inmate_id):
         self._inmate_class.discharge(inmate_id, self._monitor)
 
+    def _put(self, method, args):
+        super(Inmates, self)._put(self._timed_command, (method, args))
+
+    def _report_db_times(self):
+        """
+        Reports how long was spent in each phase of database work, a phase being the command that did it
+        """
+        for phase in sorted(self._db_times.keys()):
+            self._debug('DB time for %s - %.3fs over %d commands' % (phase, self._db_times[phase],
+                                                                     self._db_commands_counts[phase]))
+
+    def _timed_command(self, method_args):
+        method, args = method_args
+        start_time = time()
+        try:
+            method(args)
+        finally:
+            phase = method.__name__.strip('_')
+            self._db_times[phase] += time() - start_time
+            self._db_commands_counts[phase] += 1
+
+    def _wait_for_processing_to_finish(self):
+        self._read_commands_q.join()
+        self._report_db_times()
+        super(Inmates, self)._wait_for_processing_to_finish()
+
     def known_inmates_ids_starting_with(self, response_queue, start_date):
         self._put(self._known_inmates_ids_starting_with, {'response_queue': response_queue, 'start_date': start_date})
 
     def _known_inmates_ids_starting_with(self, args):
-        known_inmates_ids = []
+        known_inmates_ids = InmateIds()
         cur_date = args['start_date']
         the_yesterday = yesterday()
         while cur_date <= the_yesterday:
-            known_inmates_ids.extend([inmate.jail_id for inmate in self._inmate_class.known_inmates_for_date(cur_date)])
+            for jail_id in _jail_ids(self._inmate_class.known_inmates_for_date(cur_date)):
+                known_inmates_ids.add(jail_id)
             cur_date += ONE_DAY
         args['response_queue'].put(known_inmates_ids)
 
@@ -52,7 +85,13 @@ class Inmates(ConcurrentBase):
         self._put(self._create_update_inmate, {'inmate_id': inmate_id, 'inmate_details': inmate_details})
 
 
+def _jail_ids(inmates):
+    """
+    Fetches just the jail ids of the inmates instead of materializing CountyInmate objects
+    """
+    return inmates.values_list('jail_id', flat=True)
+
+
 def _send_inmate_ids(response_queue, inmates):
-    inmates_ids = [inmate.jail_id for inmate in inmates]
-    response_queue.put(inmates_ids)
+    response_queue.put(InmateIds(_jail_ids(inmates)))
 
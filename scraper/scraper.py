@@ -1,9 +1,13 @@
 
+from datetime import date, timedelta
+
 from controller import Controller
 from search_commands import SearchCommands
 from inmates_scraper import InmatesScraper
 from inmates import Inmates
 from countyapi.inmate import Inmate
+from countyapi.cache import bump_data_generation
+from countyapi.occupancy import SCRAPER_OCCUPANCY_DAYS, write_housing_occupancy
 from inmate_details import InmateDetails
 from http import Http
 from raw_inmate_data import RawInmateData
@@ -24,8 +28,17 @@ class Scraper:
         controller.find_missing_inmates(start_date)
         self._debug('waiting for check_for_missing_inmates processing to finish')
         controller.wait_for_finish()
+        self._data_changed()
         self._debug('finished check_for_missing_inmates')
 
+    def _data_changed(self):
+        self._debug('data generation is now %d' % bump_data_generation())
+
+    def _update_housing_occupancy(self):
+        today = date.today()
+        number_rows = write_housing_occupancy(today - timedelta(days=SCRAPER_OCCUPANCY_DAYS - 1), today)
+        self._debug('wrote %d housing occupancy rows' % number_rows)
+
     def _debug(self, msg):
         self.__monitor.debug('Scraper: %s' % msg)
 
@@ -40,4 +53,6 @@ class Scraper:
         self._debug('waiting for processing to finish')
         controller.wait_for_finish()
         raw_inmate_data.finish()
+        self._update_housing_occupancy()
+        self._data_changed()
         self._debug('finished')
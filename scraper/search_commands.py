@@ -2,6 +2,7 @@ from datetime import date
 
 from utils import ONE_DAY, yesterday
 from concurrent_base import ConcurrentBase
+from inmate_ids import InmateIds
 
 MAX_INMATE_NUMBER = 350
 
@@ -28,14 +29,16 @@ class SearchCommands(ConcurrentBase):
 
     def find_inmates(self, exclude_list=None, number_to_fetch=MAX_INMATE_NUMBER, start_date=None):
         if exclude_list is None:
-            exclude_list = []
+            exclude_list = InmateIds()
         if start_date is None:
             start_date = yesterday()
         self._put(self._find_inmates, {'excluded_inmates': exclude_list, 'number_to_fetch': number_to_fetch,
                                        'start_date': start_date})
 
     def _find_inmates(self, args):
-        excluded_inmates = set(args['excluded_inmates'])
+        excluded_inmates = args['excluded_inmates']
+        if not isinstance(excluded_inmates, InmateIds):
+            excluded_inmates = InmateIds(excluded_inmates)
         cur_date = args['start_date']
         while cur_date <= yesterday():
             for inmate_id in _jail_ids(cur_date, args['number_to_fetch']):
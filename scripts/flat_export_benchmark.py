@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Benchmark for the flat export path in countyapi.api: times writing each flat resource list as CSV and JSON
+through tastypie's full_dehydrate and through FlatRowTemplate, and checks both give the same output.
+
+Runs against the configured database, so load it with data first, e.g. a copy of the production database.
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'countyapi.settings')
+
+from django.test.client import RequestFactory
+
+from countyapi.urls import v1_api
+
+FLAT_RESOURCES = ['countyinmate', 'courtdate', 'housinghistory', 'chargeshistory']
+
+
+def timed(write_list):
+    start = time.time()
+    output = write_list()
+    return output, time.time() - start
+
+
+def csv_list(serializer, objects):
+    return ''.join(serializer.iter_csv(objects))
+
+
+def json_list(serializer, objects):
+    return u', '.join(serializer.json_dumps(serializer.to_simple(obj, {})) for obj in objects)
+
+
+def benchmark_resource(resource_name, limit):
+    resource = v1_api.canonical_resource_for(resource_name)
+    request = RequestFactory().get(resource.get_resource_uri(), {'format': 'csv', 'limit': limit})
+    serializer = resource._meta.serializer
+    objects = resource.get_object_list(request)
+    if limit:
+        objects = objects[:limit]
+    number_objects = objects.count()
+    template = resource.flat_row_template()
+
+    print('%s - %d objects' % (resource_name, number_objects))
+    for format_name, write_list in [('csv', csv_list), ('json', json_list)]:
+        dehydrated, dehydrated_time = timed(lambda: write_list(serializer,
+                                                               resource.dehydrated_bundles(request, objects)))
+        flat, flat_time = timed(lambda: write_list(serializer, template.rows(objects)))
+        print('  %-4s full_dehydrate: %7.3fs   flat rows: %7.3fs   %5.1fx faster   %s' %
+              (format_name, dehydrated_time, flat_time, dehydrated_time / max(flat_time, 0.001),
+               'same output' if flat == dehydrated else 'OUTPUT DIFFERS'))
+
+
+def flat_export_benchmark():
+    parser = argparse.ArgumentParser(description='Compare the flat export path with tastypie dehydration.')
+    parser.add_argument('-l', '--limit', action='store', type=int, dest='limit', default=0,
+                        help='Only export this many objects of each resource, defaults to all of them.')
+    parser.add_argument('-r', '--resource', action='append', dest='resources', choices=FLAT_RESOURCES,
+                        help='Resource to benchmark, can be repeated, defaults to all flat resources.')
+    args = parser.parse_args()
+
+    for resource_name in args.resources or FLAT_RESOURCES:
+        benchmark_resource(resource_name, args.limit)
+
+
+if __name__ == '__main__':
+    flat_export_benchmark()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""
+Benchmark for scraper.green_db: counts how much work the http greenlets get done while the database is
+busy, first with psycopg2 blocking the gevent hub and then with the gevent wait callback installed.
+
+Needs the Postgres database, so run it with USE_POSTGRES=1 or CCJ_PRODUCTION=1.
+"""
+
+import argparse
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'countyapi.settings')
+
+import gevent
+from django.db import connection
+from psycopg2 import extensions
+
+from scraper.green_db import gevent_wait_callback
+from scraper.inmates_scraper import WORKERS_TO_START
+
+HTTP_REQUEST_TIME = 0.01
+
+
+class HttpWorkers:
+    """
+    Stand in for the InmatesScraper workers, each one counts the requests it gets through
+    """
+
+    def __init__(self, number_workers):
+        self.requests_made = 0
+        self._keep_running = True
+        self._workers = [gevent.spawn(self._work) for _ in range(number_workers)]
+
+    def _work(self):
+        while self._keep_running:
+            gevent.sleep(HTTP_REQUEST_TIME)
+            self.requests_made += 1
+
+    def stop(self):
+        self._keep_running = False
+        gevent.joinall(self._workers)
+
+
+def db_busy_run(number_workers, db_seconds):
+    connection.close()
+    http_workers = HttpWorkers(number_workers)
+    gevent.sleep(0)
+    cursor = connection.cursor()
+    cursor.execute('SELECT pg_sleep(%s)', [db_seconds])
+    http_workers.stop()
+    return http_workers.requests_made
+
+
+def green_db_benchmark():
+    parser = argparse.ArgumentParser(description='Measure http concurrency while the database is busy.')
+    parser.add_argument('-w', '--workers', action='store', type=int, dest='workers', default=WORKERS_TO_START,
+                        help='Number of http greenlets, defaults to the number the scraper uses.')
+    parser.add_argument('-s', '--seconds', action='store', type=float, dest='seconds', default=2.0,
+                        help='How long each database call takes.')
+    args = parser.parse_args()
+
+    ideal = int(args.workers * args.seconds / HTTP_REQUEST_TIME)
+    extensions.set_wait_callback(None)
+    blocking = db_busy_run(args.workers, args.seconds)
+    extensions.set_wait_callback(gevent_wait_callback)
+    cooperative = db_busy_run(args.workers, args.seconds)
+    extensions.set_wait_callback(None)
+
+    print('http requests during a %.1fs database call with %d workers (ideal ~%d):' %
+          (args.seconds, args.workers, ideal))
+    print('  blocking psycopg2:     %d' % blocking)
+    print('  gevent wait callback:  %d' % cooperative)
+
+
+if __name__ == '__main__':
+    green_db_benchmark()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Benchmark for countyapi.intervals: times stabbing queries, who was in jail on a day, against the custody
+interval index and against the ORM query generate_summaries used to make for each day, and checks both agree.
+
+Runs against the configured database, so load it with data first, e.g. a copy of the production database.
+"""
+
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'countyapi.settings')
+
+from django.db.models import Max, Min, Q
+
+from countyapi.intervals import CustodyIndex
+from countyapi.models import CountyInmate
+
+
+def timed(run):
+    start = time.time()
+    result = run()
+    return result, time.time() - start
+
+
+def orm_inmates(day):
+    return CountyInmate.objects.filter(booking_date__lte=day)\
+        .filter(Q(discharge_date_earliest__gt=day) | Q(discharge_date_earliest__isnull=True))
+
+
+def random_days(number_days, first_day, last_day):
+    rng = random.Random(number_days)
+    span = (last_day - first_day).days
+    return [first_day + timedelta(days=rng.randint(0, span)) for _ in xrange(number_days)]
+
+
+def report(name, number_queries, seconds, orm_seconds_per_query):
+    per_query = seconds / max(number_queries, 1)
+    print('  %-10s %9d queries %8.3fs   %10.2fus per query   %8.0fx faster than the ORM' %
+          (name, number_queries, seconds, per_query * 1e6, orm_seconds_per_query / max(per_query, 1e-9)))
+
+
+def interval_index_benchmark():
+    parser = argparse.ArgumentParser(description='Compare the custody interval index with the ORM query.')
+    parser.add_argument('-c', '--counts', action='store', type=int, dest='counts', default=1000000,
+                        help='Number of count queries to run against the index, defaults to a million.')
+    parser.add_argument('-k', '--keys', action='store', type=int, dest='keys', default=10000,
+                        help='Number of jail id queries to run against the index, defaults to 10000.')
+    parser.add_argument('-o', '--orm', action='store', type=int, dest='orm', default=100,
+                        help='Number of ORM queries to time and check the index against, defaults to 100.')
+    args = parser.parse_args()
+
+    dates = CountyInmate.objects.aggregate(Min('booking_date'), Max('booking_date'))
+    first_day = datetime.combine(dates['booking_date__min'], datetime.min.time())
+    last_day = datetime.combine(dates['booking_date__max'], datetime.min.time()) + timedelta(days=30)
+
+    index, build_time = timed(CustodyIndex)
+    print('Built the index of %d custody intervals in %.3fs' % (len(index), build_time))
+
+    orm_days = random_days(args.orm, first_day, last_day)
+    orm_counts, orm_count_time = timed(lambda: [orm_inmates(day).count() for day in orm_days])
+    orm_ids, orm_ids_time = timed(lambda: [sorted(orm_inmates(day).values_list('jail_id', flat=True))
+                                           for day in orm_days])
+    agrees = orm_counts == [index.count_at(day) for day in orm_days] and \
+        orm_ids == [sorted(index.keys_at(day)) for day in orm_days]
+    print('Index and ORM %s on %d days' % ('agree' if agrees else 'DISAGREE', len(orm_days)))
+    print('  orm count  %9d queries %8.3fs   %10.2fus per query' %
+          (len(orm_days), orm_count_time, orm_count_time / max(len(orm_days), 1) * 1e6))
+    print('  orm ids    %9d queries %8.3fs   %10.2fus per query' %
+          (len(orm_days), orm_ids_time, orm_ids_time / max(len(orm_days), 1) * 1e6))
+
+    count_days = random_days(args.counts, first_day, last_day)
+    _, count_time = timed(lambda: [index.count_at(day) for day in count_days])
+    report('count_at', len(count_days), count_time, orm_count_time / max(len(orm_days), 1))
+
+    keys_days = count_days[:args.keys]
+    _, keys_time = timed(lambda: [index.keys_at(day) for day in keys_days])
+    report('keys_at', len(keys_days), keys_time, orm_ids_time / max(len(orm_days), 1))
+
+
+if __name__ == '__main__':
+    interval_index_benchmark()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Benchmark for the nested dehydration in countyapi.api: profiles dehydrating and writing out an inmate list with
+each inmate's court dates, housing history and charges, with the nested resources made once and reused as
+JailResource.nested does, and made anew for every nested object as they used to be, and checks both give the
+same output. Along with the time it reports the resources made, the fields copied for them and the function
+calls made, which is what making the resources cost.
+
+Runs against the configured database, so load it with data first, e.g. a copy of the production database.
+"""
+
+import argparse
+import cProfile
+import os
+import pstats
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'countyapi.settings')
+
+from django.test.client import RequestFactory
+
+from countyapi.api import COUNTY_INMATE_URL, JailResource
+from countyapi.urls import v1_api
+
+
+class Counter(object):
+    """
+    Counts the resources made and the fields copied for them.
+    """
+
+    def __init__(self):
+        self.resources = self.fields = 0
+        self._init = JailResource.__init__
+        counter = self
+
+        def counting_init(resource, *args, **kwargs):
+            counter.resources += 1
+            counter.fields += len(resource.base_fields)
+            counter._init(resource, *args, **kwargs)
+        JailResource.__init__ = counting_init
+
+    def close(self):
+        JailResource.__init__ = self._init
+
+
+def per_object(cls):
+    return cls()
+
+
+def json_list(resource, request, objects):
+    serializer = resource._meta.serializer
+    return u', '.join(serializer.json_dumps(serializer.to_simple(bundle, {}))
+                      for bundle in resource.dehydrated_bundles(request, objects))
+
+
+def profiled(resource, request, objects):
+    counter = Counter()
+    profile = cProfile.Profile()
+    start = time.time()
+    try:
+        output = profile.runcall(json_list, resource, request, objects)
+    finally:
+        counter.close()
+    seconds = time.time() - start
+    return output, seconds, counter, pstats.Stats(profile).total_calls
+
+
+def nested_dehydration_benchmark():
+    parser = argparse.ArgumentParser(description='Compare reusing nested resources with making them per object.')
+    parser.add_argument('-l', '--limit', action='store', type=int, dest='limit', default=5000,
+                        help='Number of inmates to dehydrate, defaults to 5000, 0 for all of them.')
+    args = parser.parse_args()
+
+    resource = v1_api.canonical_resource_for('countyinmate')
+    request = RequestFactory().get(COUNTY_INMATE_URL, {'format': 'json', 'limit': args.limit, 'related': 1})
+    objects = resource.get_object_list(request)
+    if args.limit:
+        objects = objects[:args.limit]
+    # Warm up the database, the reused resources and the querysets' caches
+    json_list(resource, request, objects[:10])
+
+    print('countyinmate - %d inmates with their histories' % objects.count())
+    nested = JailResource.__dict__['nested']
+    JailResource.nested = classmethod(per_object)
+    try:
+        per_object_output, per_object_time, per_object_counter, per_object_calls = \
+            profiled(resource, request, objects)
+    finally:
+        JailResource.nested = nested
+    output, reused_time, reused_counter, reused_calls = profiled(resource, request, objects)
+    for name, seconds, counter, calls in [('per object', per_object_time, per_object_counter, per_object_calls),
+                                          ('reused', reused_time, reused_counter, reused_calls)]:
+        print('  %-10s %8.3fs   %7d resources made   %8d fields copied   %10d function calls' %
+              (name, seconds, counter.resources, counter.fields, calls))
+    print('  %.1fx faster, %s' % (per_object_time / max(reused_time, 0.001),
+                                  'same output' if output == per_object_output else 'OUTPUT DIFFERS'))
+
+
+if __name__ == '__main__':
+    nested_dehydration_benchmark()
@@ -4,8 +4,12 @@ from datetime import datetime, date, timedelta
 import logging, argparse
 import os
 
+# Select the scraper's database configuration, see countyapi.settings
+os.environ['CCJ_SCRAPER'] = '1'
+
 from scraper.scraper import Scraper
 from scraper.monitor import Monitor
+from scraper.green_db import make_db_cooperative
 
 log = logging.getLogger('main')
 
@@ -60,6 +64,7 @@ def ng_scraper():
     try:
         monitor = Monitor(log, verbose_debug_mode=args.verbose)
         monitor.debug("%s - Started scraping inmates from Cook County Sheriff's site." % datetime.now())
+        make_db_cooperative(monitor)
 
         scraper = Scraper(monitor)
         if args.start_date:
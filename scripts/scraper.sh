@@ -15,7 +15,6 @@ export DJANGO_SETTINGS_MODULE=countyapi.settings
 PROJECT_DIR=${HOME}'/apps/cookcountyjail'
 SCRIPTS_DIR=${PROJECT_DIR}'/scripts'
 MANAGE='python '${PROJECT_DIR}'/manage.py'
-INMATE_API='http://cookcountyjail.recoveredfactory.net/api/1.0/countyinmate/'
 DB_BACKUPS_DIR=${HOME}/website/1.0/db_backups
 DB_BACKUP_FILE=cookcountyjail-$(date +%Y-%m-%d).json
 SCRAPER_OPTIONS='--verbose'
@@ -48,11 +47,12 @@ echo ${AUDIT_RESULT}
 echo "Generating summaries - `date`"
 ${MANAGE} generate_summaries
 
-echo "Priming the cache - `date`"
+echo "Writing the full list exports - `date`"
+time ${MANAGE} write_exports
+
+echo "Writing the dataset download - `date`"
+time ${MANAGE} write_dataset
 sudo -u www-data find /var/www/cache -type f -delete
-time curl -v -L -G -s -o/dev/null -d "format=jsonp&callback=processJSONP&limit=0" ${INMATE_API}
-time curl -v -L -G -s -o/dev/null -d "format=csv&limit=0" ${INMATE_API}
-time curl -v -L -G -s -o/dev/null -d "format=json&limit=0" ${INMATE_API}
 
 # TODO: port the dumpdata command
 echo "Dumping database for `date`"
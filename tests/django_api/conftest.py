@@ -0,0 +1,25 @@
+import pytest
+from django.conf import settings
+
+from countyapi import population
+from countyapi.cache import bump_data_generation
+
+
+@pytest.fixture(autouse=True)
+def new_data_generation(monkeypatch):
+    """
+    Each test makes its own data, so it starts with nothing cached and no population indexes, which are
+    only refreshed with added and changed rows, not rebuilt.
+    """
+    bump_data_generation()
+    monkeypatch.setattr(population, '_population', None)
+
+
+@pytest.fixture
+def exports_dir(tmpdir, monkeypatch):
+    """
+    Exports and the dataset are written to the test's own directory and sent by the API rather than the web server.
+    """
+    monkeypatch.setattr(settings, 'EXPORTS_DIR', str(tmpdir))
+    monkeypatch.setattr(settings, 'EXPORTS_URL', None)
+    return str(tmpdir)
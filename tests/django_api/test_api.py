@@ -0,0 +1,386 @@
+import csv
+import json
+from datetime import date, datetime
+from StringIO import StringIO
+
+import pytest
+from django.db import connection
+from django.test.client import Client, RequestFactory
+from tastypie.resources import ModelResource
+
+from countyapi import api
+from countyapi.cache import bump_data_generation
+from countyapi.models import CountyInmate, CourtDate, CourtLocation, HousingHistory, HousingLocation, ChargesHistory, \
+    DailyHousingOccupancy
+from countyapi.urls import v1_api
+
+COUNTY_INMATE_URL = '/api/1.0/countyinmate/'
+
+
+def make_inmates(number_inmates, first_booking_number=1):
+    """
+    Creates inmates each with a court date, housing history entry and charge.
+    """
+    for count in range(first_booking_number, first_booking_number + number_inmates):
+        inmate = CountyInmate.objects.create(jail_id='2014-0117%03d' % count, gender='M', race='B',
+                                             booking_date=date(2014, 1, 17))
+        court_location = CourtLocation.objects.create(location='Court Room %d' % count)
+        CourtDate.objects.create(inmate=inmate, location=court_location, date=date(2014, 1, 20))
+        housing_location = HousingLocation.objects.create(housing_location='01-A-%d' % count, division='01')
+        HousingHistory.objects.create(inmate=inmate, housing_location=housing_location,
+                                      housing_date_discovered=date(2014, 1, 18))
+        ChargesHistory.objects.create(inmate=inmate, charges='Charge %d' % count, date_seen=date(2014, 1, 18))
+
+
+def queries_for(path, params, **headers):
+    """
+    Makes the request, reading all of its content, and returns the response and the queries it made.
+    connection.queries is reset on each request.
+    """
+    connection.use_debug_cursor = True
+    try:
+        response = Client().get(path, params, **headers)
+        content = ''.join(response)
+        return response, content, [query['sql'] for query in connection.queries]
+    finally:
+        connection.use_debug_cursor = None
+
+
+def number_queries_for(path, params):
+    """
+    Makes the request and returns the number of queries it made, connection.queries is reset on each request.
+    """
+    connection.use_debug_cursor = True
+    try:
+        response = Client().get(path, params)
+        assert response.status_code == 200
+        return len(connection.queries)
+    finally:
+        connection.use_debug_cursor = None
+
+
+@pytest.mark.django_db
+class TestCountyInmateResourceQueries:
+
+    def test_related_list_queries_do_not_grow_with_inmates(self):
+        make_inmates(1)
+        params = {'format': 'json', 'limit': 0, 'related': 1}
+        one_inmate_queries = number_queries_for(COUNTY_INMATE_URL, params)
+        make_inmates(6, first_booking_number=2)
+        bump_data_generation()
+        assert number_queries_for(COUNTY_INMATE_URL, params) == one_inmate_queries
+
+    def test_detail_queries(self):
+        make_inmates(1)
+        # inmate, court dates, court locations, housing history, housing locations, charges
+        assert number_queries_for(COUNTY_INMATE_URL + '2014-0117001/', {'format': 'json'}) == 6
+
+    def test_nested_resources_are_reused(self, monkeypatch):
+        make_inmates(3)
+        made_resources = []
+        init = api.JailResource.__init__
+
+        def counting_init(resource, *args, **kwargs):
+            made_resources.append(type(resource).__name__)
+            init(resource, *args, **kwargs)
+        monkeypatch.setattr(api.JailResource, '__init__', counting_init)
+        for path in (COUNTY_INMATE_URL, api.COURT_DATE_URL, api.HOUSING_HISTORY_URL):
+            response, _, _ = queries_for(path, {'format': 'json', 'limit': 0, 'related': 1})
+            assert response.status_code == 200
+        assert len(made_resources) == len(set(made_resources))
+
+    def test_related_objects_are_dehydrated_once(self, monkeypatch):
+        make_inmates(3)
+        dehydrated = []
+        full_dehydrate = api.JailResource.full_dehydrate
+
+        def counting_full_dehydrate(resource, bundle, for_list=False):
+            dehydrated.append((type(resource).__name__, bundle.obj.pk))
+            return full_dehydrate(resource, bundle, for_list=for_list)
+        monkeypatch.setattr(api.JailResource, 'full_dehydrate', counting_full_dehydrate)
+        _, content, _ = queries_for(COUNTY_INMATE_URL, {'format': 'json', 'limit': 0, 'related': 1})
+        assert len(dehydrated) == len(set(dehydrated))
+        assert [dehydrated_object[0] for dehydrated_object in dehydrated].count('CourtDateResource') == 3
+        inmate = json.loads(content)['objects'][0]
+        assert inmate['court_dates'][0]['location']['location'] == 'Court Room 3'
+        assert inmate['housing_history'][0]['housing_location']['housing_location'] == '01-A-3'
+
+
+@pytest.mark.django_db
+class TestCsvLists:
+
+    def test_csv_list_is_streamed(self):
+        make_inmates(3)
+        response, content, queries = queries_for(COUNTY_INMATE_URL, {'format': 'csv', 'limit': 0})
+        assert response.status_code == 200
+        assert response.streaming
+        assert response['Content-Type'].startswith('text/csv')
+        assert response['Content-Disposition'] == 'attachment; filename="cookcountyjail.csv"'
+        assert 'max-age' in response['Cache-Control']
+        rows = list(csv.reader(StringIO(content)))
+        assert len(rows) == 4
+        jail_id_column = rows[0].index('jail_id')
+        assert [row[jail_id_column] for row in rows[1:]] == ['2014-0117003', '2014-0117002', '2014-0117001']
+        assert not [query for query in queries if 'COUNT(' in query]
+
+    def test_csv_list_pagination(self):
+        make_inmates(3)
+        _, content, _ = queries_for(COUNTY_INMATE_URL, {'format': 'csv', 'limit': 1, 'offset': 1})
+        rows = list(csv.reader(StringIO(content)))
+        assert len(rows) == 2
+        assert rows[1][rows[0].index('jail_id')] == '2014-0117002'
+
+    def test_csv_list_with_prefetched_relations_is_read_in_chunks(self, monkeypatch):
+        monkeypatch.setattr(api, 'STREAMING_CHUNK_SIZE', 2)
+        make_inmates(5)
+        _, content, queries = queries_for(COUNTY_INMATE_URL, {'format': 'csv', 'limit': 0, 'related': 1})
+        rows = list(csv.reader(StringIO(content)))
+        assert len(rows) == 6
+        inmate_queries = [query for query in queries if query.startswith('SELECT') and
+                          'FROM "countyapi_countyinmate"' in query]
+        assert len(inmate_queries) == 3
+
+
+class TestJailSerializer:
+
+    def test_iter_json_matches_to_json(self):
+        serializer = api.JailSerializer()
+        data = {'meta': {'limit': 0, 'total_count': 2}, 'objects': [{'jail_id': u'2014-0117001', 'b': None},
+                                                                     {'jail_id': u'2014-0117002', 'b': u'\u2028'}]}
+        assert u''.join(serializer.iter_json(data)) == serializer.to_json(data)
+        options = {'callback': 'cb'}
+        assert u''.join(serializer.iter_jsonp(data, options)) == serializer.to_jsonp(data, options)
+
+    def test_iter_json_empty_list(self):
+        serializer = api.JailSerializer()
+        data = {'meta': {'limit': 0, 'total_count': 0}, 'objects': []}
+        assert u''.join(serializer.iter_json(data)) == serializer.to_json(data)
+
+
+@pytest.mark.django_db
+class TestJsonLists:
+
+    def test_unlimited_json_list_is_streamed(self):
+        make_inmates(3)
+        response, content, _ = queries_for(COUNTY_INMATE_URL, {'format': 'json', 'limit': 0})
+        assert response.streaming
+        assert response['Content-Type'] == 'application/json'
+        data = json.loads(content)
+        assert data['meta']['total_count'] == 3
+        assert [inmate['jail_id'] for inmate in data['objects']] == ['2014-0117003', '2014-0117002', '2014-0117001']
+
+    def test_unlimited_jsonp_list_is_streamed(self):
+        make_inmates(1)
+        response, content, _ = queries_for(COUNTY_INMATE_URL, {'format': 'jsonp', 'limit': 0,
+                                                               'callback': 'processJSONP'})
+        assert response.streaming
+        assert content.startswith('processJSONP({"meta": ')
+        assert content.endswith(')')
+        assert json.loads(content[len('processJSONP('):-1])['objects'][0]['jail_id'] == '2014-0117001'
+
+    def test_invalid_jsonp_callback(self):
+        response = Client().get(COUNTY_INMATE_URL, {'format': 'jsonp', 'limit': 0, 'callback': 'alert(1);'})
+        assert response.status_code == 400
+
+    def test_limited_json_list_is_not_streamed(self):
+        make_inmates(3)
+        response, content, _ = queries_for(COUNTY_INMATE_URL, {'format': 'json', 'limit': 2})
+        assert not response.streaming
+        assert len(json.loads(content)['objects']) == 2
+
+
+@pytest.mark.django_db
+class TestObjectStreamLists:
+
+    def test_ndjson_list_is_streamed(self):
+        make_inmates(3)
+        response, content, queries = queries_for(COUNTY_INMATE_URL, {'format': 'ndjson', 'limit': 0})
+        assert response.streaming
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        lines = content.splitlines()
+        assert [json.loads(line)['jail_id'] for line in lines] == ['2014-0117003', '2014-0117002', '2014-0117001']
+        _, json_content, _ = queries_for(COUNTY_INMATE_URL, {'format': 'json', 'limit': 0})
+        assert [json.loads(line) for line in lines] == json.loads(json_content)['objects']
+        assert not [query for query in queries if 'COUNT(' in query]
+
+    def test_ndjson_list_pagination(self):
+        make_inmates(3)
+        _, content, _ = queries_for(COUNTY_INMATE_URL, {'format': 'ndjson', 'limit': 1, 'offset': 1})
+        assert [json.loads(line)['jail_id'] for line in content.splitlines()] == ['2014-0117002']
+
+    def test_ndjson_detail(self):
+        make_inmates(1)
+        response = Client().get(COUNTY_INMATE_URL + '2014-0117001/', {'format': 'ndjson'})
+        assert json.loads(response.content)['jail_id'] == '2014-0117001'
+        assert response['Content-Type'] == 'application/x-ndjson; charset=utf-8'
+
+    def test_msgpack_detail(self):
+        msgpack = pytest.importorskip('msgpack')
+        make_inmates(1)
+        response = Client().get(COUNTY_INMATE_URL + '2014-0117001/', {'format': 'msgpack'})
+        assert response['Content-Type'] == 'application/x-msgpack'
+        assert msgpack.unpackb(response.content)['jail_id'] == '2014-0117001'
+
+    def test_msgpack_list_is_streamed(self):
+        msgpack = pytest.importorskip('msgpack')
+        make_inmates(3)
+        response, content, _ = queries_for(COUNTY_INMATE_URL, {'format': 'msgpack', 'limit': 0})
+        assert response.streaming
+        assert response['Content-Type'] == 'application/x-msgpack'
+        _, json_content, _ = queries_for(COUNTY_INMATE_URL, {'format': 'json', 'limit': 0})
+        assert list(msgpack.Unpacker(StringIO(content))) == json.loads(json_content)['objects']
+
+
+@pytest.mark.django_db
+class TestFlatLists:
+
+    FLAT_RESOURCES = sorted(resource_name for resource_name in v1_api._registry
+                            if v1_api.canonical_resource_for(resource_name).flat_list_extras is not None)
+
+    def make_flat_data(self):
+        make_inmates(3)
+        inmate = CountyInmate.objects.create(jail_id='2014-0118001', person_id=None, bail_amount=50000,
+                                             discharge_date_earliest=datetime(2014, 2, 1, 3, 4), in_jail=False)
+        ChargesHistory.objects.create(inmate=inmate, charges=None, charges_citation=None, date_seen=None)
+        housing_location = HousingLocation.objects.create(housing_location='05 DR EM', division='05')
+        HousingHistory.objects.create(inmate=inmate, housing_location=housing_location,
+                                      housing_date_discovered=date(2014, 1, 19))
+        DailyHousingOccupancy.objects.create(date=date(2014, 1, 17), division='01', sub_division='A',
+                                             population=3)
+
+    def test_flat_rows_match_dehydrated_bundles(self):
+        self.make_flat_data()
+        assert 'courtdate' in self.FLAT_RESOURCES
+        for resource_name in self.FLAT_RESOURCES:
+            resource = v1_api.canonical_resource_for(resource_name)
+            request = RequestFactory().get(resource.get_resource_uri(), {'format': 'csv', 'limit': 0})
+            serializer = resource._meta.serializer
+            objects = resource.get_object_list(request)
+            dehydrated = [serializer.to_simple(bundle, {}) for bundle in resource.dehydrated_bundles(request, objects)]
+            flat = list(resource.flat_row_template().rows(objects))
+            assert dehydrated
+            assert len(dehydrated) == len(flat)
+            for dehydrated_object, flat_row in zip(dehydrated, flat):
+                assert sorted(dehydrated_object) == sorted(flat_row), resource_name
+                for key in dehydrated_object:
+                    assert dehydrated_object[key] == flat_row[key], (resource_name, key)
+            assert [serializer.json_dumps(obj) for obj in dehydrated] == [serializer.json_dumps(row) for row in flat]
+            dehydrated = list(resource.dehydrated_bundles(request, objects))
+            assert list(serializer.iter_csv(dehydrated)) == list(serializer.iter_csv(flat))
+
+    def test_flat_list_is_one_query(self):
+        self.make_flat_data()
+        for resource_name in self.FLAT_RESOURCES:
+            _, content, queries = queries_for(api.API_PATH_FORMAT % resource_name, {'format': 'csv', 'limit': 0})
+            assert len(list(csv.reader(StringIO(content)))) > 1
+            assert len(queries) == 1
+
+
+@pytest.mark.django_db
+class TestFieldProjection:
+
+    INMATE_FIELDS = 'jail_id,booking_date,in_jail'
+
+    def test_json_list_objects_only_have_requested_fields(self):
+        make_inmates(3)
+        for params in [{'limit': 0}, {'limit': 2}, {'limit': 2, 'related': 1}]:
+            params.update({'format': 'json', 'fields': self.INMATE_FIELDS})
+            response, content, queries = queries_for(api.COUNTY_INMATE_URL, params)
+            assert response.status_code == 200
+            assert not [query for query in queries if '"gender"' in query]
+            objects = json.loads(content)['objects']
+            assert objects
+            assert [sorted(obj.keys()) for obj in objects] == [['booking_date', 'in_jail', 'jail_id']] * len(objects)
+
+    def test_csv_columns_are_in_requested_order(self):
+        make_inmates(2)
+        for resource_name, fields in [('countyinmate', 'in_jail,jail_id'), ('courtdate', 'inmate_jail_id,location')]:
+            _, content, queries = queries_for(api.API_PATH_FORMAT % resource_name,
+                                              {'format': 'csv', 'limit': 0, 'fields': fields})
+            rows = list(csv.reader(StringIO(content)))
+            assert rows[0] == fields.split(',')
+            assert len(rows) == 3
+            assert len(queries) == 1
+        assert rows[1] == ['2014-0117001', 'Court Room 1']
+
+    def test_flat_rows_match_projected_bundles(self):
+        make_inmates(2)
+        resource = v1_api.canonical_resource_for('housinghistory')
+        request = RequestFactory().get(resource.get_resource_uri(),
+                                       {'format': 'csv', 'fields': 'inmate,location_id,housing_date_discovered'})
+        serializer = resource._meta.serializer
+        objects = resource.get_object_list(request)
+        dehydrated = [serializer.to_simple(bundle, {}) for bundle in resource.dehydrated_bundles(request, objects)]
+        flat = list(resource.list_objects(request, objects))
+        assert dehydrated == flat
+
+    def test_unrequested_histories_are_not_queried(self):
+        make_inmates(3)
+        params = {'format': 'json', 'related': 1, 'limit': 0}
+        _, _, all_queries = queries_for(api.COUNTY_INMATE_URL, params)
+        params['fields'] = 'jail_id,court_dates'
+        _, content, queries = queries_for(api.COUNTY_INMATE_URL, params)
+        assert len(queries) < len(all_queries)
+        assert json.loads(content)['objects'][0]['court_dates'][0]['date'] == '2014-01-20'
+        assert not [query for query in queries if 'countyapi_housinghistory' in query]
+
+    def test_fields_are_parsed_once_per_request(self, monkeypatch):
+        make_inmates(3)
+        parsed = []
+        parse_requested_fields = api.JailResource.parse_requested_fields
+
+        def counting_parse_requested_fields(resource, request):
+            parsed.append(resource._meta.resource_name)
+            return parse_requested_fields(resource, request)
+        monkeypatch.setattr(api.JailResource, 'parse_requested_fields', counting_parse_requested_fields)
+        response, _, _ = queries_for(COUNTY_INMATE_URL, {'format': 'json', 'limit': 0, 'related': 1,
+                                                         'fields': 'jail_id,court_dates'})
+        assert response.status_code == 200
+        assert 'countyinmate' in parsed
+        assert len(parsed) == len(set(parsed))
+
+    def test_unrequested_fields_are_not_dehydrated(self, monkeypatch):
+        make_inmates(2)
+        dehydrated = []
+        full_dehydrate = api.JailResource.full_dehydrate
+
+        def counting_full_dehydrate(resource, bundle, for_list=False):
+            dehydrated.append(type(resource).__name__)
+            return full_dehydrate(resource, bundle, for_list=for_list)
+        monkeypatch.setattr(api.JailResource, 'full_dehydrate', counting_full_dehydrate)
+        _, content, _ = queries_for(api.COURT_DATE_URL, {'format': 'json', 'limit': 0, 'related': 1,
+                                                         'fields': 'date,location'})
+        assert set(dehydrated) == set(['CourtDateResource', 'CourtLocationResource'])
+        objects = json.loads(content)['objects']
+        assert [sorted(obj.keys()) for obj in objects] == [['date', 'location']] * 2
+        assert objects[0]['location']['location'] == 'Court Room 1'
+
+    def test_detail_fields(self):
+        make_inmates(1)
+        response, content, queries = queries_for(api.COUNTY_INMATE_URL + '2014-0117001/',
+                                                  {'format': 'json', 'fields': 'gender'})
+        assert json.loads(content) == {'gender': 'M', 'about_this_data': api.DISCLAIMER}
+        assert len(queries) == 1
+
+    def test_unknown_field(self):
+        response = Client().get(api.COUNTY_INMATE_URL, {'format': 'json', 'fields': 'jail_id,nickname'})
+        assert response.status_code == 400
+        assert 'nickname' in response.content
+
+
+def test_detail_uris_are_quoted_as_reversed():
+    resource = v1_api.canonical_resource_for('housinglocation')
+    for pk in [u'05 DR EM', u'01-A%20', u'caf\xe9']:
+        housing_location = HousingLocation(pk=pk)
+        assert resource.get_resource_uri(housing_location) == \
+            ModelResource.get_resource_uri(resource, housing_location)
+    assert resource.get_resource_uri(HousingLocation(pk=u'05 DR EM')) == '/api/1.0/housinglocation/05%20DR%20EM/'
+
+
+@pytest.mark.django_db
+def test_csv_detail():
+    make_inmates(1)
+    response = Client().get(api.COUNTY_INMATE_URL + '2014-0117001/', {'format': 'csv'})
+    assert response.status_code == 200
+    rows = list(csv.reader(StringIO(response.content)))
+    assert rows[1][rows[0].index('jail_id')] == '2014-0117001'
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+from django.core.cache import get_cache
+from django.test.client import Client
+
+from countyapi.api import COUNTY_INMATE_URL
+from countyapi.cache import API_CACHE, bump_data_generation, data_generation
+
+from test_api import make_inmates, queries_for
+
+
+class TestDataGeneration:
+
+    def test_bump_starts_a_later_generation(self):
+        generation = data_generation()
+        assert bump_data_generation() > generation
+        assert bump_data_generation() > generation + 1
+        assert data_generation() >= generation + 2
+
+    def test_bump_clears_earlier_generations(self):
+        cache = get_cache(API_CACHE)
+        generation = data_generation()
+        cache.set('response', 'content', version=generation)
+        assert bump_data_generation() > generation
+        assert cache.get('response', version=generation) is None
+
+    def test_generation_is_kept_outside_of_the_cache(self):
+        generation = data_generation()
+        get_cache(API_CACHE).clear()
+        assert data_generation() == generation
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    PARAMS = {'format': 'json', 'limit': 10}
+
+    def test_responses_are_cached_until_the_data_changes(self):
+        make_inmates(1)
+        _, content, queries = queries_for(COUNTY_INMATE_URL, self.PARAMS)
+        assert queries
+        make_inmates(1, first_booking_number=2)
+        _, cached_content, queries = queries_for(COUNTY_INMATE_URL, self.PARAMS)
+        assert cached_content == content
+        assert not queries
+        bump_data_generation()
+        _, content, queries = queries_for(COUNTY_INMATE_URL, self.PARAMS)
+        assert queries
+        assert json.loads(content)['meta']['total_count'] == 2
+
+    def test_cached_responses_get_cache_headers(self):
+        make_inmates(1)
+        queries_for(COUNTY_INMATE_URL, self.PARAMS)
+        response, _, _ = queries_for(COUNTY_INMATE_URL, self.PARAMS)
+        assert 'max-age' in response['Cache-Control']
+        assert 'Accept' in response['Vary']
+
+    def test_streamed_responses_are_not_cached(self):
+        make_inmates(1)
+        queries_for(COUNTY_INMATE_URL, {'format': 'csv', 'limit': 0})
+        _, _, queries = queries_for(COUNTY_INMATE_URL, {'format': 'csv', 'limit': 0})
+        assert queries
+
+
+@pytest.mark.django_db
+class TestValidators:
+
+    PARAMS = {'format': 'json', 'limit': 10}
+
+    def test_responses_carry_validators(self):
+        make_inmates(1)
+        response, _, _ = queries_for(COUNTY_INMATE_URL, self.PARAMS)
+        assert response['ETag'].startswith('"')
+        assert response['Last-Modified'].endswith('GMT')
+        other_response, _, _ = queries_for(COUNTY_INMATE_URL, {'format': 'json', 'limit': 5})
+        assert other_response['ETag'] != response['ETag']
+        streamed_response, _, _ = queries_for(COUNTY_INMATE_URL, {'format': 'csv', 'limit': 0})
+        assert streamed_response['ETag']
+
+    def test_if_none_match(self):
+        make_inmates(1)
+        etag = Client().get(COUNTY_INMATE_URL, self.PARAMS)['ETag']
+        response, content, queries = queries_for(COUNTY_INMATE_URL, self.PARAMS, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert not content
+        assert not queries
+        bump_data_generation()
+        response = Client().get(COUNTY_INMATE_URL, self.PARAMS, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_if_modified_since(self):
+        make_inmates(1)
+        last_modified = Client().get(COUNTY_INMATE_URL, self.PARAMS)['Last-Modified']
+        response, _, queries = queries_for(COUNTY_INMATE_URL, self.PARAMS, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304
+        assert not queries
+        response = Client().get(COUNTY_INMATE_URL, self.PARAMS,
+                                HTTP_IF_MODIFIED_SINCE='Sat, 01 Feb 2014 00:00:00 GMT')
+        assert response.status_code == 200
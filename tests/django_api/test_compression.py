@@ -0,0 +1,96 @@
+import gzip
+import json
+import os
+import zlib
+
+import pytest
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test.client import RequestFactory
+
+from countyapi.api import COUNTY_INMATE_URL, CountyInmateResource
+from countyapi.compression import accepted_encoding, encode_response
+from countyapi.models import CountyInmate
+
+from test_api import make_inmates, queries_for
+
+
+def gunzip(content):
+    return zlib.decompress(content, 16 + zlib.MAX_WBITS)
+
+
+def encoded_and_plain(params):
+    response, content, _ = queries_for(COUNTY_INMATE_URL, params, HTTP_ACCEPT_ENCODING='gzip, deflate')
+    _, plain_content, _ = queries_for(COUNTY_INMATE_URL, params)
+    return response, content, plain_content
+
+
+@pytest.mark.django_db
+class TestResponseEncoding:
+
+    def test_responses_are_gzipped_when_accepted(self):
+        make_inmates(5)
+        response, content, plain_content = encoded_and_plain({'format': 'json', 'limit': 3})
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        assert int(response['Content-Length']) == len(content) < len(plain_content)
+        assert gunzip(content) == plain_content
+        assert len(json.loads(plain_content)['objects']) == 3
+
+    def test_streamed_responses_are_gzipped_as_they_are_sent(self):
+        make_inmates(5)
+        response, content, plain_content = encoded_and_plain({'format': 'csv', 'limit': 0})
+        assert response.streaming
+        assert response['Content-Encoding'] == 'gzip'
+        assert not response.has_header('Content-Length')
+        assert gunzip(content) == plain_content
+        assert '2014-0117005' in plain_content
+
+    def test_responses_are_cached_compressed(self):
+        make_inmates(5)
+        params = {'format': 'json', 'limit': 3}
+        response, content, queries = queries_for(COUNTY_INMATE_URL, params, HTTP_ACCEPT_ENCODING='gzip')
+        assert queries
+        cached_response, cached_content, queries = queries_for(COUNTY_INMATE_URL, params, HTTP_ACCEPT_ENCODING='gzip')
+        assert not queries
+        assert cached_content == content
+        assert cached_response['Content-Encoding'] == 'gzip'
+        plain_response, plain_content, _ = queries_for(COUNTY_INMATE_URL, params)
+        assert not plain_response.has_header('Content-Encoding')
+        assert plain_content == gunzip(content)
+        assert plain_response['ETag'] != response['ETag']
+
+    def test_short_and_error_responses_are_not_compressed(self):
+        response = encode_response(HttpResponse('{"count": 1}'), 'gzip')
+        assert response.content == '{"count": 1}'
+        assert not response.has_header('Content-Encoding')
+        response, _, _ = queries_for(COUNTY_INMATE_URL, {'format': 'json', 'fields': 'eye_color'},
+                                     HTTP_ACCEPT_ENCODING='gzip')
+        assert response.status_code == 400
+        assert not response.has_header('Content-Encoding')
+
+    def test_precompressed_exports_are_sent(self, exports_dir):
+        make_inmates(2)
+        call_command('write_exports')
+        CountyInmate.objects.all().delete()
+        path = os.path.join(exports_dir, 'countyinmate.csv')
+        response, content, queries = queries_for(COUNTY_INMATE_URL, CountyInmateResource.list_exports['csv'],
+                                                  HTTP_ACCEPT_ENCODING='gzip')
+        assert not queries
+        assert response['Content-Encoding'] == 'gzip'
+        assert content == open(path + '.gz', 'rb').read()
+        assert gzip.open(path + '.gz', 'rb').read() == open(path, 'rb').read()
+
+
+@pytest.mark.parametrize(('accept_encoding', 'encoding'), [
+    ('', None),
+    ('gzip', 'gzip'),
+    ('deflate, GZIP;q=0.5', 'gzip'),
+    ('gzip;q=0', None),
+    ('*', 'gzip'),
+    ('*, gzip;q=0', None),
+    ('identity', None),
+])
+def test_accepted_encoding(accept_encoding, encoding):
+    request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+    assert accepted_encoding(request) == encoding
@@ -0,0 +1,83 @@
+import gzip
+import json
+import os
+import sqlite3
+from datetime import date, datetime
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.test.client import Client
+
+from countyapi import dataset
+from countyapi.api import DATASET_URL
+from countyapi.models import CountyInmate
+
+from test_api import make_inmates, queries_for
+
+
+def dataset_path(exports_dir, name):
+    return os.path.join(exports_dir, 'dataset', name)
+
+
+@pytest.mark.django_db
+class TestSQLiteDataset:
+
+    @pytest.fixture(autouse=True)
+    def without_pyarrow(self, monkeypatch):
+        monkeypatch.setattr(dataset, 'pyarrow', None)
+
+    def test_tables_are_typed(self, exports_dir, monkeypatch):
+        monkeypatch.setattr(dataset, 'BATCH_SIZE', 2)
+        make_inmates(3)
+        CountyInmate.objects.filter(jail_id='2014-0117002').update(discharge_date_earliest=datetime(2014, 1, 20, 8))
+        call_command('write_dataset')
+        path = dataset_path(exports_dir, 'cookcountyjail.sqlite3')
+        assert gzip.open(path + '.gz', 'rb').read() == open(path, 'rb').read()
+        database = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+        rows = database.execute('SELECT jail_id, booking_date, discharge_date_earliest, in_jail FROM countyinmate '
+                                'ORDER BY jail_id').fetchall()
+        assert rows == [(u'2014-0117001', date(2014, 1, 17), None, 1),
+                        (u'2014-0117002', date(2014, 1, 17), datetime(2014, 1, 20, 8), 1),
+                        (u'2014-0117003', date(2014, 1, 17), None, 1)]
+        assert database.execute('SELECT inmate_id, housing_location_id FROM housinghistory ORDER BY id').fetchall() == \
+            [(u'2014-0117001', u'01-A-1'), (u'2014-0117002', u'01-A-2'), (u'2014-0117003', u'01-A-3')]
+        for table in ('housinglocation', 'courtlocation', 'courtdate', 'chargeshistory'):
+            assert database.execute('SELECT COUNT(*) FROM %s' % table).fetchone() == (3,)
+        assert not [name for name in os.listdir(os.path.dirname(path)) if name.endswith('.tmp')]
+
+    def test_dataset_files_are_listed_and_sent(self, exports_dir):
+        make_inmates(1)
+        call_command('write_dataset')
+        data = json.loads(Client().get(DATASET_URL, {'format': 'json'}).content)
+        assert data['meta']['total_count'] == 1
+        assert data['objects'][0]['file'] == 'cookcountyjail.sqlite3'
+        assert data['objects'][0]['format'] == 'sqlite3'
+        response, content, queries = queries_for(DATASET_URL, {'file': 'cookcountyjail.sqlite3'},
+                                                 HTTP_ACCEPT_ENCODING='gzip')
+        assert not queries
+        assert response['Content-Type'] == 'application/vnd.sqlite3'
+        assert response['Content-Disposition'] == 'attachment; filename="cookcountyjail.sqlite3"'
+        assert response['Content-Encoding'] == 'gzip'
+        assert content == open(dataset_path(exports_dir, 'cookcountyjail.sqlite3.gz'), 'rb').read()
+
+    def test_web_server_sends_dataset_when_exports_url_set(self, exports_dir, monkeypatch):
+        call_command('write_dataset')
+        monkeypatch.setattr(settings, 'EXPORTS_URL', '/exports/')
+        response = Client().get(DATASET_URL, {'file': 'cookcountyjail.sqlite3'})
+        assert response['X-Accel-Redirect'] == '/exports/dataset/cookcountyjail.sqlite3'
+
+    def test_unknown_file(self, exports_dir):
+        response = Client().get(DATASET_URL, {'format': 'json', 'file': '../../settings.py'})
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_parquet_dataset(exports_dir):
+    pyarrow_parquet = pytest.importorskip('pyarrow.parquet')
+    make_inmates(2)
+    call_command('write_dataset')
+    table = pyarrow_parquet.read_table(dataset_path(exports_dir, 'countyinmate.parquet'),
+                                       columns=['jail_id', 'booking_date'])
+    assert table.to_pydict() == {'jail_id': [u'2014-0117001', u'2014-0117002'],
+                                 'booking_date': [date(2014, 1, 17), date(2014, 1, 17)]}
@@ -0,0 +1,87 @@
+import gzip
+import os
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.test.client import Client
+
+from countyapi import exports
+from countyapi.api import COUNTY_INMATE_URL, CountyInmateResource
+from countyapi.models import CountyInmate
+
+from test_api import make_inmates, queries_for
+
+EXPORT_PARAMS = CountyInmateResource.list_exports
+
+
+@pytest.mark.django_db
+class TestWriteExports:
+
+    def test_exports_match_api_responses(self, exports_dir):
+        make_inmates(3)
+        api_content = dict((export_format, queries_for(COUNTY_INMATE_URL, params)[1])
+                           for export_format, params in EXPORT_PARAMS.items())
+        call_command('write_exports')
+        for export_format, content in api_content.items():
+            path = os.path.join(exports_dir, 'countyinmate.%s' % export_format)
+            assert open(path, 'rb').read() == content
+            assert gzip.open(path + '.gz', 'rb').read() == content
+        assert not [name for name in os.listdir(exports_dir) if name.endswith('.tmp')]
+
+    def test_exports_are_sent_for_matching_query_strings(self, exports_dir):
+        make_inmates(2)
+        call_command('write_exports')
+        CountyInmate.objects.all().delete()
+        for export_format, params in EXPORT_PARAMS.items():
+            response, content, queries = queries_for(COUNTY_INMATE_URL, params)
+            assert response.status_code == 200
+            assert content == open(os.path.join(exports_dir, 'countyinmate.%s' % export_format), 'rb').read()
+            assert not queries
+        _, content, queries = queries_for(COUNTY_INMATE_URL, {'format': 'json', 'limit': 0, 'gender': 'M'})
+        assert queries
+        assert '2014-0117001' not in content
+
+    def test_rewritten_exports_get_new_validators(self, exports_dir):
+        make_inmates(1)
+        call_command('write_exports')
+        response, _, _ = queries_for(COUNTY_INMATE_URL, EXPORT_PARAMS['json'])
+        make_inmates(1, first_booking_number=2)
+        call_command('write_exports')
+        rewritten_response, content, _ = queries_for(COUNTY_INMATE_URL, EXPORT_PARAMS['json'],
+                                                     HTTP_IF_NONE_MATCH=response['ETag'])
+        assert rewritten_response.status_code == 200
+        assert rewritten_response['ETag'] != response['ETag']
+        assert '2014-0117002' in content
+
+    def test_web_server_sends_exports_when_exports_url_set(self, exports_dir, monkeypatch):
+        make_inmates(1)
+        call_command('write_exports')
+        monkeypatch.setattr(settings, 'EXPORTS_URL', '/exports/')
+        response = Client().get(COUNTY_INMATE_URL, EXPORT_PARAMS['csv'])
+        assert response['X-Accel-Redirect'] == '/exports/countyinmate.csv'
+        assert response['Content-Type'].startswith('text/csv')
+        assert response['Content-Disposition'] == 'attachment; filename="cookcountyjail.csv"'
+
+    def test_requests_without_exports_are_answered_by_the_api(self, exports_dir):
+        make_inmates(1)
+        response, content, queries = queries_for(COUNTY_INMATE_URL, EXPORT_PARAMS['json'])
+        assert response.status_code == 200
+        assert '2014-0117001' in content
+        assert queries
+
+
+def test_opened_files_are_removed_when_an_export_can_not_be_opened(tmpdir, monkeypatch):
+    opened = []
+
+    def failing_open(path, mode):
+        if path.endswith(exports.GZIP_SUFFIX + exports.TEMPORARY_SUFFIX):
+            raise IOError('No space left on device')
+        opened.append(open(path, mode))
+        return opened[-1]
+    monkeypatch.setattr(exports, 'open', failing_open, raising=False)
+    with pytest.raises(IOError):
+        exports.ExportFile(os.path.join(str(tmpdir), 'countyinmate.csv'))
+    assert len(opened) == 1
+    assert opened[0].closed
+    assert not tmpdir.listdir()
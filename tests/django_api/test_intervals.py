@@ -0,0 +1,118 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Q
+
+from countyapi import intervals
+from countyapi.intervals import OPEN_END, CustodyIndex, IntervalIndex, custody_interval, day_number
+from countyapi.models import CountyInmate, DailyPopulationCounts
+
+FIRST_DAY = date(2014, 1, 1)
+
+
+def brute_force_keys(intervals, day):
+    return sorted(key for key, start, end in intervals if start <= day_number(day) < end)
+
+
+class TestIntervalIndex:
+
+    def test_matches_brute_force(self):
+        rng = random.Random(4)
+        intervals = []
+        for key in range(500):
+            start = day_number(FIRST_DAY) + rng.randint(0, 200)
+            end = OPEN_END if rng.random() < 0.2 else start + rng.randint(0, 60)
+            intervals.append((key, start, end))
+        index = IntervalIndex(intervals)
+        for offset in range(-5, 270):
+            day = FIRST_DAY + timedelta(days=offset)
+            expected = brute_force_keys(intervals, day)
+            assert sorted(index.keys_at(day)) == expected
+            assert index.count_at(day) == len(expected)
+
+    @pytest.mark.parametrize('rebuild_fraction', [0.1, 10])
+    def test_updates_match_brute_force(self, rebuild_fraction, monkeypatch):
+        monkeypatch.setattr(intervals, 'REBUILD_FRACTION', rebuild_fraction)
+        rng = random.Random(5)
+        held = {}
+        index = IntervalIndex([])
+        for _ in range(20):
+            changes = []
+            for _ in range(rng.randint(1, 30)):
+                start = day_number(FIRST_DAY) + rng.randint(0, 100)
+                changes.append((rng.randint(0, 80), start, start + rng.randint(0, 30)))
+            index.update(changes)
+            removed = rng.sample(range(80), 5)
+            index.remove(removed)
+            for key, start, end in changes:
+                held[key] = (start, end)
+            for key in removed:
+                held.pop(key, None)
+            held_intervals = [(key, start, end) for key, (start, end) in held.items()]
+            for offset in range(0, 135, 7):
+                day = FIRST_DAY + timedelta(days=offset)
+                expected = brute_force_keys(held_intervals, day)
+                assert sorted(index.keys_at(day)) == expected
+                assert index.count_at(day) == len(expected)
+
+    def test_empty_index(self):
+        index = IntervalIndex([])
+        assert index.keys_at(FIRST_DAY) == []
+        assert index.count_at(FIRST_DAY) == 0
+
+
+def test_custody_interval():
+    assert custody_interval(None, None) is None
+    assert custody_interval(date(2014, 1, 1), None) == (day_number(date(2014, 1, 1)), OPEN_END)
+    # Discharged at midnight is out of custody that day, discharged later in the day is still counted in it
+    assert custody_interval(date(2014, 1, 1), datetime(2014, 1, 5)) == \
+        (day_number(date(2014, 1, 1)), day_number(date(2014, 1, 5)))
+    assert custody_interval(date(2014, 1, 1), datetime(2014, 1, 5, 9, 30)) == \
+        (day_number(date(2014, 1, 1)), day_number(date(2014, 1, 6)))
+
+
+@pytest.mark.django_db
+def test_custody_index_matches_summaries_query():
+    rng = random.Random(7)
+    for number in range(60):
+        booking_date = FIRST_DAY + timedelta(days=rng.randint(0, 30))
+        discharged = None if rng.random() < 0.3 else \
+            datetime.combine(booking_date, datetime.min.time()) + timedelta(hours=rng.randint(0, 24 * 20))
+        CountyInmate.objects.create(jail_id='2014-0101%03d' % number, booking_date=booking_date,
+                                    discharge_date_earliest=discharged)
+    CountyInmate.objects.create(jail_id='2014-0101999', booking_date=None)
+    index = CustodyIndex()
+    for offset in range(-1, 55):
+        day = datetime.combine(FIRST_DAY + timedelta(days=offset), datetime.min.time())
+        expected = CountyInmate.objects.filter(booking_date__lte=day)\
+            .filter(Q(discharge_date_earliest__gt=day) | Q(discharge_date_earliest__isnull=True))
+        assert sorted(index.keys_at(day)) == sorted(inmate.jail_id for inmate in expected)
+        assert index.count_at(day) == expected.count()
+
+
+@pytest.mark.django_db
+def test_custody_index_refresh():
+    CountyInmate.objects.create(jail_id='2014-0101001', booking_date=date(2014, 1, 1))
+    CountyInmate.objects.create(jail_id='2014-0101002', booking_date=date(2014, 1, 1))
+    index = CustodyIndex()
+    discharged = CountyInmate.objects.get(jail_id='2014-0101001')
+    discharged.discharge_date_earliest = datetime(2014, 1, 3)
+    discharged.save()
+    CountyInmate.objects.create(jail_id='2014-0103001', booking_date=date(2014, 1, 3))
+    index.refresh()
+    assert sorted(index.keys_at(date(2014, 1, 2))) == ['2014-0101001', '2014-0101002']
+    assert sorted(index.keys_at(date(2014, 1, 3))) == ['2014-0101002', '2014-0103001']
+    assert index.count_at(date(2014, 1, 3)) == 2
+
+
+@pytest.mark.django_db
+def test_generate_summaries_population_counts(capsys):
+    CountyInmate.objects.create(jail_id='2013-0101001', gender='M', race='B', booking_date=date(2013, 1, 1),
+                                discharge_date_earliest=datetime(2013, 1, 3, 12, 0))
+    CountyInmate.objects.create(jail_id='2013-0102001', gender='F', race='W', booking_date=date(2013, 1, 2))
+    call_command('generate_summaries')
+    counts = DailyPopulationCounts.objects.order_by('booking_date')
+    assert [(str(day.booking_date), day.total, day.male_b, day.female_w) for day in counts] == \
+        [('2013-01-01', 1, 1, 0), ('2013-01-02', 2, 1, 1)]
@@ -0,0 +1,50 @@
+import json
+from datetime import date
+
+import pytest
+from django.core.management import call_command
+
+from countyapi.api import DAILY_HOUSING_OCCUPANCY_URL
+from countyapi.models import DailyHousingOccupancy
+from countyapi.occupancy import write_housing_occupancy
+
+from test_api import queries_for
+from test_population import make_population
+
+
+def occupancy_rows():
+    return [(str(row.date), row.division, row.sub_division, row.population)
+            for row in DailyHousingOccupancy.objects.all()]
+
+
+@pytest.mark.django_db
+class TestHousingOccupancy:
+
+    def test_write_housing_occupancy(self):
+        make_population()
+        assert write_housing_occupancy(date(2014, 1, 1), date(2014, 1, 4)) == 7
+        assert occupancy_rows() == [
+            ('2014-01-01', '01', '', 1), ('2014-01-01', '02', '', 1),
+            ('2014-01-02', '01', '', 1), ('2014-01-02', '02', '', 1),
+            ('2014-01-03', '01', '', 1), ('2014-01-03', '02', '', 1),
+            ('2014-01-04', '02', '', 1),
+        ]
+
+    def test_command_replaces_the_period(self):
+        make_population()
+        DailyHousingOccupancy.objects.create(date=date(2014, 1, 3), division='09', sub_division='', population=5)
+        DailyHousingOccupancy.objects.create(date=date(2014, 1, 5), division='09', sub_division='', population=5)
+        call_command('generate_housing_occupancy', start='2014-01-03', end='2014-01-04')
+        assert occupancy_rows() == [('2014-01-03', '01', '', 1), ('2014-01-03', '02', '', 1),
+                                    ('2014-01-04', '02', '', 1), ('2014-01-05', '09', '', 5)]
+
+    def test_division_over_time_is_one_query(self):
+        make_population()
+        write_housing_occupancy(date(2014, 1, 1), date(2014, 1, 4))
+        response, content, queries = queries_for(DAILY_HOUSING_OCCUPANCY_URL,
+                                                 {'format': 'json', 'limit': 0, 'division': '02',
+                                                  'date__gte': '2014-01-02', 'count': 'false'})
+        assert response.status_code == 200
+        assert [(row['date'], row['population']) for row in json.loads(content)['objects']] == \
+            [('2014-01-02', 1), ('2014-01-03', 1), ('2014-01-04', 1)]
+        assert len(queries) == 1
@@ -0,0 +1,129 @@
+import base64
+import json
+from urlparse import urlparse, parse_qs
+
+import pytest
+from django.test.client import Client
+from mock import MagicMock
+
+from countyapi import paginators
+from countyapi.api import COUNTY_INMATE_URL, HOUSING_HISTORY_URL, COURT_DATE_URL
+from countyapi.models import CountyInmate
+
+from test_api import make_inmates, queries_for
+
+
+def walk(path, params):
+    """
+    Follows the next links from the first page to the last, returning the objects and the queries of each page.
+    """
+    objects, page_queries = [], []
+    while params is not None:
+        response, content, queries = queries_for(path, params)
+        assert response.status_code == 200
+        data = json.loads(content)
+        objects.extend(data['objects'])
+        page_queries.append(queries)
+        next_uri = data['meta']['next']
+        params = dict((key, values[0]) for key, values in parse_qs(urlparse(next_uri).query).items()) \
+            if next_uri else None
+    return objects, page_queries
+
+
+@pytest.mark.django_db
+class TestCursorPaginator:
+
+    def test_walks_inmates_in_order(self):
+        make_inmates(5)
+        objects, page_queries = walk(COUNTY_INMATE_URL, {'format': 'json', 'limit': 2, 'cursor': ''})
+        assert [inmate['jail_id'] for inmate in objects] == ['2014-0117%03d' % count for count in range(5, 0, -1)]
+        assert len(page_queries) == 3
+        assert not [query for queries in page_queries for query in queries if 'OFFSET' in query]
+
+    def test_walks_housing_history_by_id(self):
+        make_inmates(3)
+        objects, _ = walk(HOUSING_HISTORY_URL, {'format': 'json', 'limit': 1, 'cursor': ''})
+        ids = [housing['id'] for housing in objects]
+        assert len(ids) == 3
+        assert ids == sorted(ids)
+
+    def test_count_can_be_skipped(self):
+        make_inmates(3)
+        _, content, queries = queries_for(COUNTY_INMATE_URL, {'format': 'json', 'limit': 2, 'cursor': ''})
+        assert json.loads(content)['meta']['total_count'] == 3
+        assert [query for query in queries if 'COUNT(' in query]
+        _, content, queries = queries_for(COUNTY_INMATE_URL, {'format': 'json', 'limit': 2, 'cursor': '',
+                                                              'count': 'false'})
+        assert 'total_count' not in json.loads(content)['meta']
+        assert not [query for query in queries if 'COUNT(' in query]
+
+    def test_unlimited_cursor_list(self):
+        make_inmates(3)
+        objects, page_queries = walk(COUNTY_INMATE_URL, {'format': 'json', 'limit': 0, 'cursor': ''})
+        assert len(objects) == 3
+        assert len(page_queries) == 1
+
+    def test_bad_requests(self):
+        assert Client().get(COUNTY_INMATE_URL, {'format': 'json', 'cursor': 'not a cursor'}).status_code == 400
+        assert Client().get(COUNTY_INMATE_URL, {'format': 'json', 'cursor': '',
+                                                'order_by': 'booking_date'}).status_code == 400
+        assert Client().get(COURT_DATE_URL, {'format': 'json', 'cursor': ''}).status_code == 400
+
+    @pytest.mark.parametrize(('path', 'position'), [
+        (COUNTY_INMATE_URL, {'a': 1}),
+        (COUNTY_INMATE_URL, []),
+        (COUNTY_INMATE_URL, [1]),
+        (COUNTY_INMATE_URL, [None]),
+        (COUNTY_INMATE_URL, ['2014-0117001', '2014-0117002']),
+        (HOUSING_HISTORY_URL, ['1']),
+        (HOUSING_HISTORY_URL, [True]),
+    ])
+    def test_cursors_with_invalid_positions(self, path, position):
+        cursor = base64.urlsafe_b64encode(json.dumps(position))
+        response = Client().get(path, {'format': 'json', 'cursor': cursor})
+        assert response.status_code == 400
+        assert 'Invalid cursor' in response.content
+
+
+@pytest.mark.django_db
+class TestJailPaginator:
+
+    PARAMS = {'format': 'json', 'limit': 2, 'gender': 'M'}
+
+    def test_count_is_cached_for_the_filters(self):
+        make_inmates(3)
+        _, content, queries = queries_for(COUNTY_INMATE_URL, self.PARAMS)
+        assert json.loads(content)['meta']['total_count'] == 3
+        assert len([query for query in queries if 'COUNT(' in query]) == 1
+        _, content, queries = queries_for(COUNTY_INMATE_URL, dict(self.PARAMS, offset=2))
+        assert json.loads(content)['meta']['total_count'] == 3
+        assert not [query for query in queries if 'COUNT(' in query]
+
+    def test_count_can_be_skipped(self):
+        make_inmates(3)
+        _, content, queries = queries_for(COUNTY_INMATE_URL, dict(self.PARAMS, count='false'))
+        meta = json.loads(content)['meta']
+        assert 'total_count' not in meta
+        assert 'offset=2' in meta['next']
+        assert not [query for query in queries if 'COUNT(' in query]
+        _, content, _ = queries_for(COUNTY_INMATE_URL, dict(self.PARAMS, count='false', offset=2))
+        assert json.loads(content)['meta']['next'] is None
+
+    def test_estimate_is_exact_count_on_sqlite(self):
+        make_inmates(3)
+        _, content, _ = queries_for(COUNTY_INMATE_URL, dict(self.PARAMS, count='estimate'))
+        assert json.loads(content)['meta']['total_count'] == 3
+
+    def test_invalid_count(self):
+        assert Client().get(COUNTY_INMATE_URL, dict(self.PARAMS, count='maybe')).status_code == 400
+
+
+class TestPlannerEstimate:
+
+    def test_reads_plan_rows(self, monkeypatch):
+        connection = MagicMock()
+        connection.cursor.return_value.fetchone.return_value = ('[{"Plan": {"Plan Rows": 1234}}]',)
+        monkeypatch.setattr(paginators, 'connections', {'default': connection})
+        assert paginators.planner_estimate(CountyInmate.objects.filter(gender='M')) == 1234
+        sql = connection.cursor.return_value.execute.call_args[0][0]
+        assert sql.startswith('EXPLAIN (FORMAT JSON) SELECT')
@@ -0,0 +1,85 @@
+import csv
+import json
+from datetime import date, datetime
+from StringIO import StringIO
+
+import pytest
+from django.test.client import Client
+
+from countyapi.api import POPULATION_URL
+from countyapi.cache import bump_data_generation
+from countyapi.models import CountyInmate, HousingHistory, HousingLocation
+
+from test_api import queries_for
+
+
+def make_population():
+    """
+    Three inmates: one in division 01 then moved to 02, one in 02 discharged on the 3rd and one without housing.
+    """
+    division_01 = HousingLocation.objects.create(housing_location='01-A-1', division='01')
+    division_02 = HousingLocation.objects.create(housing_location='02-B-1', division='02')
+    moved = CountyInmate.objects.create(jail_id='2014-0101001', booking_date=date(2014, 1, 1))
+    HousingHistory.objects.create(inmate=moved, housing_location=division_01, housing_date_discovered=date(2014, 1, 2))
+    HousingHistory.objects.create(inmate=moved, housing_location=division_02, housing_date_discovered=date(2014, 1, 4))
+    discharged = CountyInmate.objects.create(jail_id='2014-0101002', booking_date=date(2014, 1, 1),
+                                             discharge_date_earliest=datetime(2014, 1, 3, 10, 0))
+    HousingHistory.objects.create(inmate=discharged, housing_location=division_02,
+                                  housing_date_discovered=date(2014, 1, 1))
+    CountyInmate.objects.create(jail_id='2014-0102001', booking_date=date(2014, 1, 2))
+
+
+def population_for(params):
+    response = Client().get(POPULATION_URL, dict(params, format='json'))
+    assert response.status_code == 200
+    return json.loads(response.content)['objects']
+
+
+@pytest.mark.django_db
+class TestPopulationResource:
+
+    def test_population_on_a_date(self):
+        make_population()
+        assert population_for({'date': '2014-01-03', 'ids': 'true'}) == [{
+            'date': '2014-01-03', 'total': 3, 'division_01': 1, 'division_02': 1, 'division_unknown': 1,
+            'jail_ids': ['2014-0101001', '2014-0101002', '2014-0102001'],
+        }]
+
+    def test_population_over_a_range(self):
+        make_population()
+        days = population_for({'start_date': '2013-12-31', 'end_date': '2014-01-04'})
+        assert [(day['date'], day['total'], day['division_01'], day['division_02']) for day in days] == [
+            ('2013-12-31', 0, 0, 0),
+            ('2014-01-01', 2, 1, 1),
+            ('2014-01-02', 3, 1, 1),
+            ('2014-01-03', 3, 1, 1),
+            ('2014-01-04', 2, 0, 1),
+        ]
+        assert 'jail_ids' not in days[0]
+
+    def test_csv(self):
+        make_population()
+        response = Client().get(POPULATION_URL, {'format': 'csv', 'date': '2014-01-02', 'ids': '1'})
+        rows = list(csv.reader(StringIO(response.content)))
+        assert rows == [['date', 'total', 'division_01', 'division_02', 'division_unknown', 'jail_ids'],
+                        ['2014-01-02', '3', '1', '1', '1', '2014-0101001 2014-0101002 2014-0102001']]
+
+    def test_indexes_are_refreshed_when_data_changes(self):
+        make_population()
+        _, _, queries = queries_for(POPULATION_URL, {'format': 'json', 'date': '2014-01-02'})
+        assert queries
+        _, _, queries = queries_for(POPULATION_URL, {'format': 'json', 'date': '2014-01-05'})
+        assert not queries
+        booked = CountyInmate.objects.create(jail_id='2014-0105001', booking_date=date(2014, 1, 5))
+        HousingHistory.objects.create(inmate=booked, housing_location=HousingLocation.objects.get(division='01'),
+                                      housing_date_discovered=date(2014, 1, 5))
+        bump_data_generation()
+        day = population_for({'date': '2014-01-05'})[0]
+        assert (day['total'], day['division_01'], day['division_02']) == (3, 1, 1)
+
+    @pytest.mark.parametrize('params', [{}, {'date': '2014-13-01'}, {'start_date': '2014-01-01'},
+                                        {'start_date': '2014-01-05', 'end_date': '2014-01-01'},
+                                        {'start_date': '2014-01-01', 'end_date': '2014-03-01', 'ids': 'true'}])
+    def test_bad_requests(self, params):
+        response = Client().get(POPULATION_URL, dict(params, format='json'))
+        assert response.status_code == 400
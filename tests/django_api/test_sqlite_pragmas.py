@@ -0,0 +1,27 @@
+import sqlite3
+
+from django.db.backends.signals import connection_created
+from mock import Mock
+
+from countyapi.sqlite_pragmas import set_sqlite_pragmas
+
+
+class TestSqlitePragmas:
+
+    def test_pragmas_set_on_sqlite_connection(self, tmpdir):
+        connection = Mock()
+        connection.vendor = 'sqlite'
+        connection.connection = sqlite3.connect(str(tmpdir.join('ccj')))
+        set_sqlite_pragmas(None, connection)
+        assert connection.connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert connection.connection.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+        assert connection.connection.execute('PRAGMA cache_size').fetchone()[0] == -64000
+
+    def test_other_databases_left_alone(self):
+        connection = Mock()
+        connection.vendor = 'postgresql'
+        set_sqlite_pragmas(None, connection)
+        assert not connection.connection.execute.called
+
+    def test_registered_for_new_connections(self):
+        assert set_sqlite_pragmas in [receiver() for _, receiver in connection_created.receivers]
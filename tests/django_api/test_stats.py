@@ -0,0 +1,101 @@
+import csv
+import json
+from datetime import date
+from StringIO import StringIO
+
+import pytest
+from django.test.client import Client
+
+from countyapi.api import STATS_URL
+from countyapi.models import CountyInmate, HousingHistory, HousingLocation
+from countyapi.stats import percentiles
+
+from test_api import queries_for
+
+
+def make_stats_inmates():
+    """
+    Five inmates, three men and two women, the second woman discharged and moved from division 01 to 02.
+    """
+    division_01 = HousingLocation.objects.create(housing_location='01-A-1', division='01')
+    division_02 = HousingLocation.objects.create(housing_location='02-B-1', division='02')
+    for number, (gender, race, age, bail, in_jail) in enumerate([('M', 'B', 17, 1000, True),
+                                                                  ('M', 'W', 30, 5000, True),
+                                                                  ('M', 'B', 30, None, True),
+                                                                  ('F', 'B', None, 5000, True),
+                                                                  ('F', 'LW', 70, 20000, False)]):
+        inmate = CountyInmate.objects.create(jail_id='2014-0117%03d' % number, gender=gender, race=race,
+                                             age_at_booking=age, bail_amount=bail, in_jail=in_jail,
+                                             booking_date=date(2014, 1, 17 + number % 2))
+        HousingHistory.objects.create(inmate=inmate, housing_location=division_01,
+                                      housing_date_discovered=date(2014, 1, 18))
+    HousingHistory.objects.create(inmate=inmate, housing_location=division_02,
+                                  housing_date_discovered=date(2014, 1, 20))
+
+
+def stats_for(params):
+    params = dict(params, format='json')
+    response = Client().get(STATS_URL, params)
+    assert response.status_code == 200
+    return json.loads(response.content)
+
+
+@pytest.mark.django_db
+class TestStatsResource:
+
+    def test_totals_without_dimensions(self):
+        make_stats_inmates()
+        data = stats_for({})
+        assert data['meta']['total_count'] == 1
+        assert data['meta']['dimensions'] == []
+        totals = data['objects'][0]
+        assert totals['count'] == 5
+        assert (totals['age_under_18'], totals['age_25_34'], totals['age_65_and_over'], totals['age_unknown']) == \
+            (1, 2, 1, 1)
+        assert totals['bail_count'] == 4
+        assert (totals['bail_p25'], totals['bail_p50'], totals['bail_p75'], totals['bail_p90']) == \
+            (1000, 5000, 5000, 20000)
+
+    def test_grouped_by_dimensions(self):
+        make_stats_inmates()
+        rows = stats_for({'dimensions': 'gender,race'})['objects']
+        assert [(row['gender'], row['race'], row['count']) for row in rows] == \
+            [('F', 'B', 1), ('F', 'LW', 1), ('M', 'B', 2), ('M', 'W', 1)]
+        assert [row['bail_p50'] for row in rows] == [5000, 20000, 1000, 5000]
+
+    def test_grouped_by_latest_division(self):
+        make_stats_inmates()
+        rows = stats_for({'dimensions': 'division,in_jail'})['objects']
+        assert [(row['division'], row['in_jail'], row['count']) for row in rows] == \
+            [('01', True, 4), ('02', False, 1)]
+
+    def test_filters(self):
+        make_stats_inmates()
+        rows = stats_for({'dimensions': 'date', 'gender': 'M'})['objects']
+        assert [(row['date'], row['count']) for row in rows] == [('2014-01-17', 2), ('2014-01-18', 1)]
+
+    def test_csv(self):
+        make_stats_inmates()
+        response = Client().get(STATS_URL, {'format': 'csv', 'dimensions': 'gender'})
+        rows = list(csv.reader(StringIO(response.content)))
+        assert rows[0][:3] == ['gender', 'count', 'age_under_18']
+        assert [row[:2] for row in rows[1:]] == [['F', '2'], ['M', '3']]
+
+    def test_responses_are_cached(self):
+        make_stats_inmates()
+        params = {'format': 'json', 'dimensions': 'race'}
+        _, content, queries = queries_for(STATS_URL, params)
+        assert queries
+        _, cached_content, queries = queries_for(STATS_URL, params)
+        assert cached_content == content
+        assert not queries
+
+    def test_unknown_dimension(self):
+        response = Client().get(STATS_URL, {'format': 'json', 'dimensions': 'gender,eye_color'})
+        assert response.status_code == 400
+        assert 'eye_color' in response.content
+
+
+def test_percentiles():
+    assert list(percentiles([(100, 1)], 1)) == [(25, 100), (50, 100), (75, 100), (90, 100)]
+    assert list(percentiles([(1, 5), (2, 4), (3, 1)], 10)) == [(25, 1), (50, 1), (75, 2), (90, 2)]
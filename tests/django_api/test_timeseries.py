@@ -0,0 +1,65 @@
+import json
+from datetime import date
+
+import pytest
+from django.test.client import Client
+
+from countyapi.api import TIME_SERIES_URL
+from countyapi.models import DailyBookingsCounts, DailyPopulationCounts
+
+from test_api import queries_for
+
+
+def make_daily_counts():
+    for day, total in [(3, 30), (1, 10), (2, 20)]:
+        DailyPopulationCounts.objects.create(booking_date=date(2014, 1, day), total=total, male_b=total - 1)
+        DailyBookingsCounts.objects.create(booking_date=date(2014, 1, day), total=day, female_minors=1)
+
+
+def time_series_for(params):
+    response = Client().get(TIME_SERIES_URL, dict(params, format='json'))
+    assert response.status_code == 200
+    return json.loads(response.content)['series']
+
+
+@pytest.mark.django_db
+class TestTimeSeriesResource:
+
+    def test_series_are_columns(self):
+        make_daily_counts()
+        series = time_series_for({})
+        assert sorted(series) == ['bookings', 'population']
+        population = series['population']
+        assert population['dates'] == ['2014-01-01', '2014-01-02', '2014-01-03']
+        assert population['total'] == [10, 20, 30]
+        assert population['male_b'] == [9, 19, 29]
+        assert population['female_w'] == [0, 0, 0]
+        assert sorted(population) == sorted(['dates'] + [field.name for field in DailyPopulationCounts._meta.fields
+                                                         if field.name not in ('id', 'booking_date')])
+        assert series['bookings']['female_minors'] == [1, 1, 1]
+
+    def test_date_range_and_series(self):
+        make_daily_counts()
+        series = time_series_for({'series': 'bookings', 'start_date': '2014-01-02', 'end_date': '2014-01-05'})
+        assert list(series) == ['bookings']
+        assert series['bookings']['dates'] == ['2014-01-02', '2014-01-03']
+        assert series['bookings']['total'] == [2, 3]
+
+    def test_series_are_read_once_per_data_generation(self):
+        make_daily_counts()
+        _, _, queries = queries_for(TIME_SERIES_URL, {'format': 'json', 'series': 'population'})
+        assert len(queries) == 1
+        _, _, queries = queries_for(TIME_SERIES_URL, {'format': 'json', 'series': 'population',
+                                                      'start_date': '2014-01-02'})
+        assert not queries
+
+    @pytest.mark.parametrize('params', [{'series': 'arrests'}, {'start_date': 'yesterday'}, {'format': 'csv'}])
+    def test_bad_requests(self, params):
+        response = Client().get(TIME_SERIES_URL, dict({'format': 'json'}, **params))
+        assert response.status_code == 400
+
+
+def test_csv_errors_are_written_as_a_row():
+    response = Client().get(TIME_SERIES_URL, {'format': 'csv'})
+    assert response.status_code == 400
+    assert response.content.splitlines()[0] == 'error'
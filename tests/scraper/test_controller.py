@@ -4,6 +4,7 @@ from mock import Mock, call
 from datetime import date, timedelta
 
 from scraper.controller import Controller, NEW_INMATE_SEARCH_WINDOW_SIZE
+from scraper.inmate_ids import InmateIds
 from scraper.monitor import Monitor
 from scraper.heartbeat import HEARTBEAT_INTERVAL
 from scraper.search_commands import SearchCommands
@@ -64,9 +65,10 @@ class TestController:
         send_response(controller, active_jail_ids)
         assert self._search.update_inmates_status.call_args_list == [call(active_jail_ids)]
         self.send_notification(self._search, SearchCommands.FINISHED_UPDATE_INMATES_STATUS)
-        assert self._search.find_inmates.call_args_list == \
-               [call(exclude_list=missing_inmate_exclude_list,
-                     start_date=date.today() - ONE_DAY * (NEW_INMATE_SEARCH_WINDOW_SIZE + 1))]
+        assert len(self._search.find_inmates.call_args_list) == 1
+        _, find_inmates_kwargs = self._search.find_inmates.call_args
+        assert sorted(find_inmates_kwargs['exclude_list']) == sorted(missing_inmate_exclude_list)
+        assert find_inmates_kwargs['start_date'] == date.today() - ONE_DAY * (NEW_INMATE_SEARCH_WINDOW_SIZE + 1)
         self.send_notification(self._search, SearchCommands.FINISHED_FIND_INMATES)
         assert inmates.recently_discharged_inmates_ids.call_args_list == [call(controller.inmates_response_q)]
         send_response(controller, active_jail_ids)
@@ -115,7 +117,7 @@ def gen_active_ids_previous_10_days_before_yesterday():
         for count in inmate_counts:
             inmate_ids.append(cur_date.strftime('%Y-%m%d' + count))
         cur_date -= ONE_DAY
-    return inmate_ids, inmate_ids[0 : len(inmate_counts) * NEW_INMATE_SEARCH_WINDOW_SIZE]
+    return InmateIds(inmate_ids), inmate_ids[0 : len(inmate_counts) * NEW_INMATE_SEARCH_WINDOW_SIZE]
 
 
 def run_controller(controller):
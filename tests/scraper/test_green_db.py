@@ -0,0 +1,30 @@
+from mock import Mock, patch
+from psycopg2 import extensions
+
+from scraper import green_db
+from scraper.green_db import gevent_wait_callback, make_db_cooperative, POSTGRES_ENGINE
+
+SQLITE_ENGINE = 'django.db.backends.sqlite3'
+
+
+class Test_GreenDb:
+
+    def test_wait_callback_waits_on_socket(self):
+        conn = Mock()
+        conn.poll.side_effect = [extensions.POLL_WRITE, extensions.POLL_READ, extensions.POLL_OK]
+        conn.fileno.return_value = 7
+        with patch.object(green_db, 'wait_read') as wait_read, patch.object(green_db, 'wait_write') as wait_write:
+            gevent_wait_callback(conn)
+            wait_write.assert_called_once_with(7, timeout=None)
+            wait_read.assert_called_once_with(7, timeout=None)
+        assert conn.poll.call_count == 3
+
+    def test_installed_for_postgres(self):
+        with patch.object(extensions, 'set_wait_callback') as set_wait_callback:
+            assert make_db_cooperative(Mock(), {'default': {'ENGINE': POSTGRES_ENGINE}})
+            set_wait_callback.assert_called_once_with(gevent_wait_callback)
+
+    def test_not_installed_for_sqlite(self):
+        with patch.object(extensions, 'set_wait_callback') as set_wait_callback:
+            assert not make_db_cooperative(Mock(), {'default': {'ENGINE': SQLITE_ENGINE}})
+            assert not set_wait_callback.called
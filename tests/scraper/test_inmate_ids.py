@@ -0,0 +1,47 @@
+from datetime import date
+
+from scraper.inmate_ids import InmateIds
+
+
+class Test_InmateIds:
+
+    def test_membership(self):
+        inmate_ids = InmateIds(['2014-0117015', '2014-0117001', '2014-1107234'])
+        assert '2014-0117015' in inmate_ids
+        assert '2014-0117001' in inmate_ids
+        assert '2014-1107234' in inmate_ids
+        assert '2014-0117002' not in inmate_ids
+        assert '2014-0118015' not in inmate_ids
+        assert len(inmate_ids) == 3
+
+    def test_duplicates_are_counted_once(self):
+        inmate_ids = InmateIds(['2014-0117015', '2014-0117015'])
+        inmate_ids.add('2014-0117015')
+        assert len(inmate_ids) == 1
+        assert list(inmate_ids) == ['2014-0117015']
+
+    def test_iterates_in_descending_order(self):
+        jail_ids = ['2014-0116350', '2014-0117001', '2014-0117015', '2013-1231100']
+        assert list(InmateIds(jail_ids)) == sorted(jail_ids, reverse=True)
+
+    def test_booking_days(self):
+        inmate_ids = InmateIds(['2014-0116350', '2014-0117001', '2014-0117015'])
+        assert inmate_ids.booking_days() == ['2014-0117', '2014-0116']
+
+    def test_irregular_ids(self):
+        inmate_ids = InmateIds(['2014-0117015', '1', 'not-a-jail-id'])
+        assert '1' in inmate_ids
+        assert 'not-a-jail-id' in inmate_ids
+        assert '2' not in inmate_ids
+        assert len(inmate_ids) == 3
+        assert list(inmate_ids) == ['2014-0117015', 'not-a-jail-id', '1']
+
+    def test_booked_between(self):
+        jail_ids = ['2014-0115001', '2014-0116350', '2014-0117001', '2014-0117015', '2014-0119002', 'irregular']
+        inmate_ids = InmateIds(jail_ids)
+        booked = inmate_ids.booked_between(date(2014, 1, 16), date(2014, 1, 18))
+        assert list(booked) == ['2014-0117015', '2014-0117001', '2014-0116350']
+        assert len(booked) == 3
+        assert '2014-0115001' not in booked
+        assert '2014-0119002' not in booked
+        assert len(inmate_ids) == len(jail_ids)
@@ -12,14 +12,14 @@ class TestInmates:
 
     def test_active_inmates_ids(self):
         inmate_class = Mock()
-        j_ids = [j_id for j_id in range(1, 4)]
-        input_values = [make_county_inmate(j_id) for j_id in j_ids]
-        inmate_class.active_inmates.return_value = input_values
+        j_ids = gen_jail_ids(3)
+        inmate_class.active_inmates.return_value.values_list.return_value = j_ids
         inmates = Inmates(inmate_class, self.__raw_inmate_data, Mock())
         response_q = Queue(1)
         inmates.active_inmates_ids(response_q)
         active_inmates_ids = response_q.get()
-        assert active_inmates_ids == j_ids
+        assert sorted(active_inmates_ids) == j_ids
+        assert inmate_class.active_inmates.return_value.values_list.call_args_list == [call('jail_id', flat=True)]
         assert self.__raw_inmate_data.call_args_list == []
 
     def test_add_inmate(self):
@@ -52,16 +52,30 @@ class TestInmates:
         assert monitor.notify.call_args_list == [call(inmates.__class__, inmates.FINISHED_PROCESSING)]
         assert self.__raw_inmate_data.call_args_list == []
 
+    def test_finish_reports_db_times(self):
+        Inmate_TestDouble.clear_class_vars()
+        monitor = Mock()
+        inmates = Inmates(Inmate_TestDouble, self.__raw_inmate_data, monitor)
+        inmates.add(23, Mock())
+        inmates.update(24, Mock())
+        inmates.discharge(25)
+        inmates.finish()
+        db_time_msgs = [args[0] for args, _ in monitor.debug.call_args_list if 'DB time' in args[0]]
+        assert len(db_time_msgs) == 2
+        assert db_time_msgs[0].startswith('Inmates: DB time for create_update_inmate - ')
+        assert db_time_msgs[0].endswith(' over 2 commands')
+        assert db_time_msgs[1].startswith('Inmates: DB time for discharge - ')
+        assert db_time_msgs[1].endswith(' over 1 commands')
+
     def test_recently_discharged_inmates_ids(self):
         inmate_class = Mock()
-        j_ids = [j_id for j_id in range(1, 4)]
-        input_values = [make_county_inmate(j_id) for j_id in j_ids]
-        inmate_class.recently_discharged_inmates.return_value = input_values
+        j_ids = gen_jail_ids(3)
+        inmate_class.recently_discharged_inmates.return_value.values_list.return_value = j_ids
         inmates = Inmates(inmate_class, self.__raw_inmate_data, Mock())
         response_q = Queue(1)
         inmates.recently_discharged_inmates_ids(response_q)
         recently_discharged_inmates_ids = response_q.get()
-        assert recently_discharged_inmates_ids == j_ids
+        assert sorted(recently_discharged_inmates_ids) == j_ids
         assert self.__raw_inmate_data.call_args_list == []
 
     def test_update_inmate(self):
@@ -93,6 +107,10 @@ class Inmate_TestDouble:
     def clear_class_vars():
         Inmate_TestDouble.instantiated = []
 
+    @staticmethod
+    def discharge(inmate_id, monitor):
+        pass
+
     @staticmethod
     def instantiated_called(expected_call_count):
         instantiated = Inmate_TestDouble.instantiated
@@ -102,7 +120,5 @@ class Inmate_TestDouble:
         self.saved_count += 1
 
 
-def make_county_inmate(inmate_id):
-    county_inmate = Mock()
-    county_inmate.jail_id = inmate_id
-    return county_inmate
+def gen_jail_ids(num_to_gen):
+    return ['2014-0117%03d' % num for num in range(1, num_to_gen + 1)]